@@ -0,0 +1,19 @@
+from typing import Dict, Iterable, List
+
+# 词条ID在程序内统一为int
+# 旧版filters.json、total.json的键以及setting.py写出的文件中是字符串，只在读写JSON时转换
+AffixId = int
+
+
+def affix_id(value) -> AffixId:
+    """把JSON中的词条ID（int或数字字符串）转为AffixId"""
+    return value if type(value) is int else int(value)
+
+
+def affix_ids(values: Iterable) -> List[AffixId]:
+    return [affix_id(value) for value in values]
+
+
+def affix_counts(data: Dict) -> Dict[AffixId, int]:
+    """JSON对象的键只能是字符串，读取以词条ID为键的计数时转回int"""
+    return {affix_id(key): count for key, count in data.items()}
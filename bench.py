@@ -0,0 +1,229 @@
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+from config import Config
+from filter import Filter, Item
+from memory import FakeProcess
+from reader import Reader
+from task import Task
+from terminal import Terminal
+from total import Total
+
+
+class NullTerminal:
+    def logs(self, message, log_type=None):
+        pass
+
+
+class StubRoot:
+    """无界面的Tk根窗口替身，after不做调度"""
+
+    def after(self, ms, func=None):
+        return None
+
+
+class StubText:
+    """无界面的Text替身，保留插入的内容以模拟真实开销"""
+
+    def __init__(self):
+        self.chunks: List[str] = []
+
+    def config(self, **kwargs):
+        pass
+
+    def insert(self, index, text):
+        self.chunks.append(text)
+
+    def delete(self, start, end=None):
+        pass
+
+    def see(self, index):
+        pass
+
+
+class StubLog:
+    def prints(self, message, log_type=None):
+        pass
+
+
+def headless_terminal() -> Terminal:
+    """不创建Tk窗口的Terminal，用于测量logs与批量绘制的开销"""
+    return Terminal(StubLog(), root=StubRoot(), text=StubText())
+
+
+def measure(func: Callable[[int], None], ops: int, rounds: int) -> Dict:
+    """执行rounds轮，每轮ops次操作，返回每次操作的耗时（纳秒）"""
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter_ns()
+        func(ops)
+        samples.append((time.perf_counter_ns() - start) / ops)
+    return {
+        "ops": ops,
+        "rounds": rounds,
+        "ns_per_op": statistics.median(samples),
+        "min_ns": min(samples),
+        "max_ns": max(samples),
+    }
+
+
+def synthetic_relics(entry_ids: List[int], blacklist_ids: List[int], count: int, rng: random.Random) -> List[Dict]:
+    """从真实词条ID空间随机生成遗物事件"""
+    return [{
+        "buff": rng.sample(entry_ids, 3),
+        "debuff": rng.sample(blacklist_ids, rng.randint(0, 3)),
+    } for _ in range(count)]
+
+
+def synthetic_rules(entry_ids: List[int], blacklist_ids: List[int], count: int, rng: random.Random) -> List[Dict]:
+    return [{
+        "name": f"bench-{i}",
+        "must": [str(tag) for tag in rng.sample(entry_ids, rng.randint(10, 40))],
+        "extra": [str(tag) for tag in rng.sample(entry_ids, rng.randint(0, 20))],
+        "ban": [str(tag) for tag in rng.sample(blacklist_ids, rng.randint(0, 4))],
+        "score": rng.choice([10, 11, 12, 20, 21, 30]),
+    } for i in range(count)]
+
+
+def run(ops: int = 10000, rounds: int = 5, seed: int = 0) -> Dict:
+    rng = random.Random(seed)
+    config = Config(NullTerminal())
+    entry = config.get_entry_data()
+    blacklist = config.get_blacklist_data()
+    entry_ids = sorted(int(tag) for tag in entry)
+    blacklist_ids = sorted(int(tag) for tag in blacklist)
+
+    relics = synthetic_relics(entry_ids, blacklist_ids, ops, rng)
+    items = [Item.from_dict(relic) for relic in relics]
+    tag_strs = [str(relic["buff"][0]) for relic in relics]
+    results = {}
+
+    def bench_from_dict(n):
+        for relic in relics[:n]:
+            Item.from_dict(relic)
+    results["item_from_dict"] = measure(bench_from_dict, ops, rounds)
+
+    for rule_count in (1, 10, 100):
+        flt = Filter(synthetic_rules(entry_ids, blacklist_ids, rule_count, rng))
+
+        def bench_match(n, flt=flt):
+            for item in items[:n]:
+                flt.match(item)
+        results[f"filter_match_{rule_count}"] = measure(bench_match, ops, rounds)
+
+    task = Task.__new__(Task)
+    task.entry = config.get_entry_table()
+    tag_ints = [relic["buff"][0] for relic in relics]
+
+    def bench_tag_name(n):
+        for tag in tag_ints[:n]:
+            task.get_tag_name(tag)
+    results["task_get_tag_name"] = measure(bench_tag_name, ops, rounds)
+
+    with tempfile.TemporaryDirectory() as directory:
+        total_config = Config(NullTerminal())
+        total_config.total_path = os.path.join(directory, "total.json")
+        total_config.save_total_data({tag: 1 for tag in entry_ids})
+        total_config.load_total_data()
+        total = Total(total_config)
+
+        def bench_total_add(n):
+            for tag in tag_ints[:n]:
+                total.add(tag)
+        results["total_add"] = measure(bench_total_add, ops, rounds)
+
+        def bench_save_total(n):
+            for _ in range(n):
+                total_config.save_total_data(total.get_all())
+        results["config_save_total_data"] = measure(bench_save_total, max(1, ops // 1000), rounds)
+
+    # 假进程内存后端上的读取：一次snapshot与逐个读取三个数值
+    reader = Reader(exe_module_name="nightreign.exe",
+                    backend=FakeProcess.nightreign(anhen=100000, wangzheng=50, quantity=10))
+
+    def bench_snapshot(n):
+        for _ in range(n):
+            reader.snapshot()
+    results["reader_snapshot"] = measure(bench_snapshot, ops, rounds)
+
+    def bench_get_each(n):
+        for _ in range(n):
+            reader.get_anhen()
+            reader.get_wangzheng()
+            reader.get_quantity()
+    results["reader_get_each"] = measure(bench_get_each, ops, rounds)
+
+    terminal = headless_terminal()
+
+    def bench_logs(n):
+        for i in range(n):
+            terminal.logs("词条1:" + tag_strs[i])
+        while terminal._pending:
+            terminal._drain()
+    results["terminal_logs"] = measure(bench_logs, ops, rounds)
+
+    # 单个遗物的决策开销：解析 + 10条规则匹配 + 6次名称查询与计数 + 8行日志
+    per_relic = (results["item_from_dict"]["ns_per_op"]
+                 + results["filter_match_10"]["ns_per_op"]
+                 + 6 * (results["task_get_tag_name"]["ns_per_op"] + results["total_add"]["ns_per_op"])
+                 + 8 * results["terminal_logs"]["ns_per_op"])
+
+    return {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": seed,
+        "per_relic_us": per_relic / 1000,
+        "results": results,
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return ""
+
+
+def compare(current: Dict, baseline: Dict) -> None:
+    """打印与基准结果的对比，比值>1表示变慢"""
+    print(f"{'stage':<28}{'baseline':>12}{'current':>12}{'ratio':>8}")
+    for stage, result in current["results"].items():
+        old = baseline.get("results", {}).get(stage)
+        if not old:
+            continue
+        ratio = result["ns_per_op"] / old["ns_per_op"] if old["ns_per_op"] else 0.0
+        print(f"{stage:<28}{old['ns_per_op']:>12.0f}{result['ns_per_op']:>12.0f}{ratio:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="遗物决策热路径基准测试")
+    parser.add_argument("--ops", type=int, default=10000, help="每轮操作次数")
+    parser.add_argument("--rounds", type=int, default=5, help="轮数，结果取中位数")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--output", default=None, help="结果JSON输出路径")
+    parser.add_argument("--compare", default=None, help="与之前的结果JSON对比")
+    args = parser.parse_args()
+
+    result = run(args.ops, args.rounds, args.seed)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=4)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(result, json.load(f))
+    else:
+        print(json.dumps(result, ensure_ascii=False, indent=4))
+    print(f"单个遗物决策开销: {result['per_relic_us']:.2f}us")
+
+
+if __name__ == "__main__":
+    main()
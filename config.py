@@ -1,142 +1,130 @@
-import json
-
+from affix import affix_counts
+from entries import EntryTable, build_table, open_table
+from store import JsonStore
 from terminal import Terminal
 
 
+def _path_property(key: str):
+    return property(lambda self: self.store.path(key),
+                    lambda self, path: self.store.set_path(key, path))
+
+
 class Config:
+    save_path = _path_property("save")
+    task_path = _path_property("task")
+    filter_path = _path_property("filter")
+    entry_path = _path_property("entry")
+    blacklist_path = _path_property("blacklist")
+    total_path = _path_property("total")
+    debug_path = _path_property("debug")
+    hook_path = _path_property("hook")
 
     def __init__(self, terminal: Terminal):
         self.terminal = terminal
+        # 全部配置文件共用一个按(mtime, size)失效的缓存存储
+        self.store = JsonStore({
+            "save": "./config/save.json",
+            "task": "./config/task.json",
+            "filter": "./config/filters.json",
+            "entry": "./asset/entry.json",
+            "blacklist": "./asset/blacklist.json",
+            "total": "./config/total.json",
+            "debug": "./config/debug.json",
+            "hook": "./config/hook.json",
+        }, on_error=lambda message: self.terminal.logs(message, log_type="error"))
+        self.entry_table: EntryTable = None
 
-        self.save_path = "./config/save.json"
-        self.save = {}
-
-        self.task_path = "./config/task.json"
-        self.task = {}
-
-        self.filter_path = "./config/filters.json"
-        self.filter = {}
+        self.terminal.logs("配置初始化完成")
 
-        self.entry = {}
-        self.entry_path = "./asset/entry.json"
+    def get(self, key: str):
+        """读取配置，文件未变化时直接返回缓存"""
+        return self.store.get(key)
 
-        self.total_path = "./config/total.json"
-        self.total = {}
+    def cached(self, key: str):
+        """读取缓存，不访问磁盘；文件变化由FileWatcher调用load刷新"""
+        return self.store.cached(key)
 
-        self.debug_path = "./config/debug.json"
-        self.debug = {}
+    def load(self, key: str):
+        """忽略缓存重新读取配置"""
+        return self.store.load(key)
 
+    def save(self, key: str, data, indent=4) -> bool:
+        return self.store.save(key, data, indent)
 
-        self.terminal.logs("配置初始化完成")
+    def load_save_data(self):
+        return self.store.load("save")
 
     def get_save_data(self):
-        if not self.save:
-            self.load_save_data()
-        return self.save
+        return self.store.get("save")
 
-    def load_save_data(self):
-        self.save = {}
-        try:
-            with open(self.save_path, 'r', encoding='utf-8') as f:
-                self.save = json.load(f)
-        except json.JSONDecodeError:
-            self.terminal.logs(f"无法解析{self.save_path}", log_type="error")
-        except Exception as e:
-            self.terminal.logs(
-                f"读取{self.save_path}时发生错误: {e}", log_type="error")
+    def load_task_data(self):
+        return self.store.load("task")
 
     def get_task_data(self):
-        if not self.task:
-            self.load_task_data()
-        return self.task
+        return self.store.get("task")
 
-    def load_task_data(self):
-        self.task = {}
-        try:
-            with open(self.task_path, 'r', encoding='utf-8') as f:
-                self.task = json.load(f)
-        except json.JSONDecodeError:
-            self.terminal.logs(f"无法解析{self.task_path}", log_type="error")
-        except Exception as e:
-            self.terminal.logs(
-                f"读取{self.task_path}时发生错误: {e}", log_type="error")
-
-    def laod_filter_data(self):
-        self.filter = {}
-        try:
-            with open(self.filter_path, 'r', encoding='utf-8') as f:
-                self.filter = json.load(f)
-        except json.JSONDecodeError:
-            self.terminal.logs(f"无法解析{self.filter_path}", log_type="error")
-        except Exception as e:
-            self.terminal.logs(
-                f"读取{self.filter_path}时发生错误: {e}", log_type="error")
+    def load_filter_data(self):
+        return self.store.load("filter")
 
     def get_filter_data(self):
-        if not self.filter:
-            self.laod_filter_data()
-        return self.filter
+        return self.store.get("filter")
+
+    # 兼容旧的拼写
+    laod_filter_data = load_filter_data
 
     def load_entry_data(self):
-        self.entry = {}
-        try:
-            with open(self.entry_path, 'r', encoding='utf-8') as f:
-                self.entry = json.load(f)
-        except json.JSONDecodeError:
-            self.terminal.logs(f"无法解析{self.entry_path}", log_type="error")
-        except Exception as e:
-            self.terminal.logs(
-                f"读取{self.entry_path}时发生错误: {e}", log_type="error")
-    
+        return self.store.load("entry")
+
     def get_entry_data(self):
-        if not self.entry:
-            self.load_entry_data()
-        return self.entry
-    
+        return self.store.get("entry")
+
+    def load_blacklist_data(self):
+        return self.store.load("blacklist")
+
+    def get_blacklist_data(self):
+        return self.store.get("blacklist")
+
+    def get_entry_table(self):
+        """entry.json与blacklist.json编译成的二进制词条表，JSON修改后重新编译"""
+        if self.entry_table is None or self.entry_table.stale(self.entry_path, self.blacklist_path):
+            # 先释放旧表的映射，Windows下映射未关闭时无法替换cache/entry.bin
+            if self.entry_table is not None:
+                self.entry_table.close()
+                self.entry_table = None
+            try:
+                self.entry_table = open_table(self.entry_path, self.blacklist_path)
+            except ValueError as e:
+                self.terminal.logs(f"编译词条表时发生错误: {e}", log_type="error")
+                return EntryTable(buffer=build_table("", ""))
+        return self.entry_table
+
+    def get_tag_space(self):
+        """entry.json与blacklist.json中的全部词条ID，用于批量匹配的标签空间"""
+        return self.get_entry_table().ids()
+
     def load_total_data(self):
-        self.total = {}
-        try:
-            with open(self.total_path, 'r', encoding='utf-8') as f:
-                self.total = json.load(f)
-        except json.JSONDecodeError:
-            self.terminal.logs(f"无法解析{self.total_path}", log_type="error")
-        except Exception as e:
-            self.terminal.logs(
-                f"读取{self.total_path}时发生错误: {e}", log_type="error")
+        return self.store.load("total")
 
     def get_total_data(self):
-        if not self.total:
-            self.load_total_data()
-        return self.total
-    
+        """以int词条ID为键的计数，兼容字符串键"""
+        total = self.store.get("total")
+        return affix_counts(total) if isinstance(total, dict) else {}
+
     def save_total_data(self, total: dict):
-        try:
-            with open(self.total_path, 'w', encoding='utf-8') as f:
-                json.dump(total, f, ensure_ascii=False, indent=4)
-        except Exception as e:
-            self.terminal.logs(
-                f"写入{self.total_path}时发生错误: {e}", log_type="error")
-    
+        """紧凑格式原子写入，写入中途崩溃不会破坏原文件；int键由json写为字符串"""
+        return self.store.save("total", total, indent=None)
+
     def load_debug_data(self):
-        self.debug = {}
-        try:
-            with open(self.debug_path, 'r', encoding='utf-8') as f:
-                self.debug = json.load(f)
-        except json.JSONDecodeError:
-            self.terminal.logs(f"无法解析{self.debug_path}", log_type="error")
-        except Exception as e:
-            self.terminal.logs(
-                f"读取{self.debug_path}时发生错误: {e}", log_type="error")
+        return self.store.load("debug")
 
     def get_debug_data(self):
-        if not self.debug:
-            self.load_debug_data()
-        return self.debug
-    
+        return self.store.get("debug")
+
     def save_debug_data(self, debug: dict):
-        try:
-            with open(self.debug_path, 'w', encoding='utf-8') as f:
-                json.dump(debug, f, ensure_ascii=False, indent=4)
-        except Exception as e:
-            self.terminal.logs(
-                f"写入{self.debug_path}时发生错误: {e}", log_type="error")
+        return self.store.save("debug", debug)
+
+    def load_hook_data(self):
+        return self.store.load("hook")
+
+    def get_hook_data(self):
+        return self.store.cached("hook")
@@ -0,0 +1,275 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from bisect import bisect_left
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from affix import AffixId, affix_id
+
+# 文件头：魔数、版本、保留、词条数、字符串池大小、entry.json与blacklist.json的(mtime_ns, size)
+TABLE_MAGIC = b"RLET"
+TABLE_VERSION = 1
+HEADER = struct.Struct("<4sHHIIqqqq")
+# 词条记录：名称/分类/叠加说明在字符串池中的下标、来源、介绍与备注在文本区的(偏移, 长度)
+RECORD = struct.Struct("<HHHBxIIII")
+POOL_ITEM = struct.Struct("<II")
+ID_SIZE = struct.calcsize("<i")
+ORDER_SIZE = struct.calcsize("<H")
+
+SOURCES = ("entry", "blacklist")
+FIELDS = ("name", "type", "explanation", "note", "superposability")
+
+Stamp = Tuple[int, int]
+
+
+def _stamp(path: str) -> Stamp:
+    try:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+    except OSError:
+        return -1, -1
+
+
+def _load_json(path: str) -> Dict:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def build_table(entry_path: str, blacklist_path: str) -> bytes:
+    """把entry.json与blacklist.json编译为二进制词条表"""
+    stamps = _stamp(entry_path) + _stamp(blacklist_path)
+    records = []
+    for source, path in enumerate((entry_path, blacklist_path)):
+        for tag_id, data in _load_json(path).items():
+            records.append((affix_id(tag_id), source, data))
+
+    pool: List[bytes] = []
+    pool_index: Dict[str, int] = {}
+    blob = bytearray()
+
+    def intern(text: str) -> int:
+        index = pool_index.get(text)
+        if index is None:
+            index = pool_index[text] = len(pool)
+            encoded = text.encode("utf-8")
+            pool.append(POOL_ITEM.pack(len(blob), len(encoded)))
+            blob.extend(encoded)
+        return index
+
+    def text(value: str) -> Tuple[int, int]:
+        encoded = value.encode("utf-8")
+        offset = len(blob)
+        blob.extend(encoded)
+        return offset, len(encoded)
+
+    # 记录按ID排序以便二分查找，order保留JSON中的原始顺序
+    sorted_positions = sorted(range(len(records)), key=lambda position: records[position][0])
+    rank = {position: index for index, position in enumerate(sorted_positions)}
+    ids = bytearray()
+    body = bytearray()
+    for position in sorted_positions:
+        tag_id, source, data = records[position]
+        ids.extend(struct.pack("<i", tag_id))
+        body.extend(RECORD.pack(
+            intern(str(data.get("name", ""))),
+            intern(str(data.get("type", ""))),
+            intern(str(data.get("superposability", ""))),
+            source,
+            *text(str(data.get("explanation", ""))),
+            *text(str(data.get("note", "")))))
+    order = b"".join(struct.pack("<H", rank[position]) for position in range(len(records)))
+
+    header = HEADER.pack(TABLE_MAGIC, TABLE_VERSION, 0, len(records), len(pool), *stamps)
+    return header + bytes(ids) + bytes(body) + order + b"".join(pool) + bytes(blob)
+
+
+class Entry:
+    """词条记录，介绍与备注在首次访问时才从表中解码"""
+    __slots__ = ("id", "name", "type", "superposability", "source", "_table", "_explanation", "_note")
+
+    def __init__(self, table: "EntryTable", index: int):
+        name, type_, superposability, source, *spans = table._record(index)
+        self.id = table._ids[index]
+        self.name = table._pool[name]
+        self.type = table._pool[type_]
+        self.superposability = table._pool[superposability]
+        self.source = SOURCES[source]
+        self._table = table
+        self._explanation = spans[0:2]
+        self._note = spans[2:4]
+
+    @property
+    def explanation(self) -> str:
+        return self._table._text(*self._explanation)
+
+    @property
+    def note(self) -> str:
+        return self._table._text(*self._note)
+
+    def get(self, key: str, default=None):
+        """兼容原先的字典用法"""
+        return getattr(self, key) if key in FIELDS else default
+
+
+class EntrySection(Mapping):
+    """某一来源的词条，按JSON中的原始顺序以词条ID为键，兼容原先的字典用法"""
+
+    def __init__(self, table: "EntryTable", source: str):
+        self._table = table
+        self._indexes = table._source_indexes(SOURCES.index(source))
+        self._keys: Dict[AffixId, int] = {table._ids[index]: index for index in self._indexes}
+
+    def __getitem__(self, tag_id: AffixId) -> Entry:
+        return Entry(self._table, self._keys[tag_id])
+
+    def __contains__(self, tag_id) -> bool:
+        return tag_id in self._keys
+
+    def __iter__(self) -> Iterator[AffixId]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+class EntryTable:
+    """
+    通过mmap读取的二进制词条表
+    打开时只解码字符串池（名称、分类、叠加说明，已intern），介绍与备注按需解码
+    """
+
+    def __init__(self, path: Optional[str] = None, buffer: Optional[bytes] = None):
+        self.path = path
+        self._file = None
+        self._mmap = None
+        if buffer is None:
+            self._file = open(path, 'rb')
+            try:
+                self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # 空文件无法映射
+                self._file.close()
+                raise
+            buffer = self._mmap
+        self._view = memoryview(buffer)
+        try:
+            self._parse()
+        except Exception:
+            self.close()
+            raise
+
+    def _parse(self) -> None:
+        view = self._view
+        if len(view) < HEADER.size:
+            raise ValueError("词条表已损坏")
+        magic, version, _, count, pool_count, *stamps = HEADER.unpack_from(view, 0)
+        if magic != TABLE_MAGIC or version != TABLE_VERSION:
+            raise ValueError("词条表格式不匹配")
+        self.stamps = tuple(stamps)
+        ids_offset = HEADER.size
+        self._records_offset = ids_offset + count * ID_SIZE
+        order_offset = self._records_offset + count * RECORD.size
+        pool_offset = order_offset + count * ORDER_SIZE
+        self._blob_offset = pool_offset + pool_count * POOL_ITEM.size
+        if self._blob_offset > len(view):
+            raise ValueError("词条表已损坏")
+        # ID列表很小，转为list后二分查找比直接在memoryview上更快
+        self._ids = list(struct.unpack_from(f"<{count}i", view, ids_offset))
+        self._order = list(struct.unpack_from(f"<{count}H", view, order_offset))
+        self._pool = tuple(
+            sys.intern(self._text(*POOL_ITEM.unpack_from(view, pool_offset + i * POOL_ITEM.size)))
+            for i in range(pool_count))
+        # 热路径按下标取名称，不必再解析记录
+        records = view[self._records_offset:self._records_offset + count * RECORD.size]
+        self._names = tuple(self._pool[record[0]] for record in RECORD.iter_unpack(records))
+        self._name_cache: Dict[AffixId, str] = {}
+
+    def _record(self, index: int) -> Tuple[int, ...]:
+        return RECORD.unpack_from(self._view, self._records_offset + index * RECORD.size)
+
+    def _text(self, offset: int, length: int) -> str:
+        start = self._blob_offset + offset
+        return str(self._view[start:start + length], "utf-8")
+
+    def _source_indexes(self, source: int) -> List[int]:
+        return [index for index in self._order if self._record(index)[3] == source]
+
+    def stale(self, entry_path: str, blacklist_path: str) -> bool:
+        """JSON文件的(mtime, size)与编译时不同"""
+        return self.stamps != _stamp(entry_path) + _stamp(blacklist_path)
+
+    def index(self, tag_id: AffixId) -> int:
+        """二分查找词条ID，不存在时返回-1"""
+        ids = self._ids
+        index = bisect_left(ids, tag_id)
+        return index if index < len(ids) and ids[index] == tag_id else -1
+
+    def name(self, tag_id: AffixId, default: str = "") -> str:
+        """词条名称，查过的ID缓存在字典中，之后每个遗物只需一次字典查找"""
+        name = self._name_cache.get(tag_id)
+        if name is None:
+            index = self.index(tag_id)
+            if index < 0:
+                return default
+            name = self._name_cache[tag_id] = self._names[index]
+        return name
+
+    def get(self, tag_id: AffixId) -> Optional[Entry]:
+        index = self.index(tag_id)
+        return Entry(self, index) if index >= 0 else None
+
+    def ids(self) -> List[AffixId]:
+        """全部词条ID，已排序"""
+        return list(self._ids)
+
+    def section(self, source: str) -> EntrySection:
+        return EntrySection(self, source)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, tag_id) -> bool:
+        return self.index(tag_id) >= 0
+
+    def close(self) -> None:
+        if getattr(self, "_view", None) is not None:
+            self._view.release()
+            self._view = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def open_table(entry_path: str = "./asset/entry.json", blacklist_path: str = "./asset/blacklist.json",
+               path: str = "./cache/entry.bin") -> EntryTable:
+    """打开词条表，表不存在、已损坏或JSON已修改时重新编译"""
+    stamps = _stamp(entry_path) + _stamp(blacklist_path)
+    try:
+        table = EntryTable(path)
+        if table.stamps == stamps:
+            return table
+        table.close()
+    except (OSError, ValueError):
+        pass
+
+    data = build_table(entry_path, blacklist_path)
+    temp_path = f"{path}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+        return EntryTable(path)
+    except OSError:
+        # 缓存目录不可写时直接使用内存中的表
+        return EntryTable(buffer=data)
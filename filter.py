@@ -1,38 +1,50 @@
 from dataclasses import dataclass, field
-from typing import Dict, FrozenSet, List, Set
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from affix import AffixId, affix_ids
 
 
 # ==================== 数据模型 ====================
 @dataclass(frozen=True)
 class Item:
-    buff: FrozenSet[int] = field(default_factory=frozenset)
-    debuff: FrozenSet[int] = field(default_factory=frozenset)
+    buff: FrozenSet[AffixId] = field(default_factory=frozenset)
+    debuff: FrozenSet[AffixId] = field(default_factory=frozenset)
     
     @classmethod
     def from_dict(cls, data: Dict) -> 'Item':
-        """从字典创建物品，自动处理字符串转数字"""
+        """从事件字典创建物品，Hook发来的词条ID已是int，不再逐个转换"""
         return cls(
-            buff=frozenset(map(int, data.get('buff', []))),
-            debuff=frozenset(map(int, data.get('debuff', [])))
+            buff=frozenset(data.get('buff', ())),
+            debuff=frozenset(data.get('debuff', ()))
+        )
+
+    @classmethod
+    def from_json(cls, data: Dict) -> 'Item':
+        """从JSON字典创建物品，兼容字符串形式的词条ID"""
+        return cls(
+            buff=frozenset(affix_ids(data.get('buff', []))),
+            debuff=frozenset(affix_ids(data.get('debuff', [])))
         )
 
 
 @dataclass(frozen=True)
 class FilterRule:
     name: str
-    must: Set[int]
-    extra: Set[int]
-    ban: Set[int]
+    must: Set[AffixId]
+    extra: Set[AffixId]
+    ban: Set[AffixId]
     score: int
     
     @classmethod
     def from_dict(cls, data: Dict) -> 'FilterRule':
-        """从字典创建规则，自动处理字符串转数字、转集合"""
+        """从字典创建规则，兼容字符串形式的词条ID"""
         return cls(
             name=data['name'],
-            must=set(map(int, data.get('must', []))),
-            extra=set(map(int, data.get('extra', []))),
-            ban=set(map(int, data.get('ban', []))),
+            must=set(affix_ids(data.get('must', []))),
+            extra=set(affix_ids(data.get('extra', []))),
+            ban=set(affix_ids(data.get('ban', []))),
             score=int(data['score'])
         )
 
@@ -45,17 +57,54 @@ class Filter:
         :param rules_data: 规则列表（字典格式，对应你的JSON结构）
         """
         self._rules: List[FilterRule] = []
+        # 编译后的倒排索引：词条ID -> (命中规则位掩码, ((规则下标, 权重), ...))
+        self._tag_index: Dict[AffixId, Tuple[int, Tuple[Tuple[int, int], ...]]] = {}
+        # 词条ID -> 禁用该词条的规则位掩码
+        self._ban_index: Dict[AffixId, int] = {}
+        # 每条规则的生效阈值（score为0时等价于阈值1）
+        self._thresholds: List[int] = []
+        # 阈值<=0的规则，无需命中任何词条即可匹配
+        self._always_mask = 0
         self._update_rules(rules_data)
 
     def _update_rules(self, rules_data: List[Dict]) -> None:
         """内部方法：更新规则列表"""
         self._rules = [FilterRule.from_dict(rd) for rd in rules_data]
+        self._compile_rules()
+
+    def _compile_rules(self) -> None:
+        """内部方法：将规则编译为倒排索引，使一个物品只需一次遍历即可对所有规则打分"""
+        hit_masks: Dict[int, int] = {}
+        weights: Dict[int, List[Tuple[int, int]]] = {}
+        ban_index: Dict[int, int] = {}
+        thresholds: List[int] = []
+        always_mask = 0
+        for index, rule in enumerate(self._rules):
+            bit = 1 << index
+            # 与_calculate_score一致：同时在must和extra中的词条只按must计分
+            for tag in rule.must:
+                hit_masks[tag] = hit_masks.get(tag, 0) | bit
+                weights.setdefault(tag, []).append((index, 10))
+            for tag in rule.extra - rule.must:
+                hit_masks[tag] = hit_masks.get(tag, 0) | bit
+                weights.setdefault(tag, []).append((index, 1))
+            for tag in rule.ban:
+                ban_index[tag] = ban_index.get(tag, 0) | bit
+            threshold = rule.score if rule.score != 0 else 1
+            thresholds.append(threshold)
+            if threshold <= 0:
+                always_mask |= bit
+        self._tag_index = {tag: (hit_masks[tag], tuple(weights[tag])) for tag in hit_masks}
+        self._ban_index = ban_index
+        self._thresholds = thresholds
+        self._always_mask = always_mask
 
     def reload_rules(self, rules_data: List[Dict]) -> None:
         """【暴露接口】重载过滤条件，由外部传入新的规则数据"""
         self._update_rules(rules_data)
 
     def _calculate_score(self, item: Item, rule: FilterRule) -> int:
+        """单条规则的参考打分实现，match的编译索引与其保持一致"""
         if item.debuff & rule.ban:
             return -1
         must_count = 0
@@ -68,16 +117,110 @@ class Filter:
         return must_count * 10 + extra_count * 1
 
     def match(self, item: Item) -> (bool, int):
-        score = 0
-        for rule in self._rules:
-            score = self._calculate_score(item, rule)
-            if score == -1:
+        """
+        按规则顺序返回第一条匹配的规则得分
+        未匹配时返回最后一条规则的得分（被禁用为-1，无规则为0）
+        """
+        matched, score, _ = self.match_rule(item)
+        return matched, score
+
+    def match_rule(self, item: Item) -> Tuple[bool, int, int]:
+        """同match，额外返回匹配的规则下标，未匹配为-1"""
+        if not self._rules:
+            return False, 0, -1
+
+        ban_mask = 0
+        ban_index = self._ban_index
+        for tag in item.debuff:
+            ban_mask |= ban_index.get(tag, 0)
+
+        hit_mask = 0
+        scores: Dict[int, int] = {}
+        tag_index = self._tag_index
+        for tag in item.buff:
+            entry = tag_index.get(tag)
+            if entry is None:
                 continue
-            if rule.score == 0:
-                if score > 0: 
-                    return True,score
-                else:
-                    continue            
-            if score >= rule.score:
-                return True,score
-        return False, score
+            hit_mask |= entry[0]
+            for index, weight in entry[1]:
+                scores[index] = scores.get(index, 0) + weight
+
+        candidates = (hit_mask | self._always_mask) & ~ban_mask
+        thresholds = self._thresholds
+        while candidates:
+            low = candidates & -candidates
+            index = low.bit_length() - 1
+            score = scores.get(index, 0)
+            if score >= thresholds[index]:
+                return True, score, index
+            candidates ^= low
+
+        last = len(self._rules) - 1
+        if ban_mask >> last & 1:
+            return False, -1, -1
+        return False, scores.get(last, 0), -1
+
+    def _encode_tags(self, groups: List[FrozenSet[int]], columns: Dict[int, int]) -> np.ndarray:
+        """内部方法：将每个物品的词条集合编码为标签空间中的列下标矩阵，空位指向全零的填充列"""
+        pad = len(columns)
+        width = max((len(group) for group in groups), default=0)
+        encoded = np.full((len(groups), max(width, 1)), pad, dtype=np.int32)
+        for row, group in enumerate(groups):
+            for col, tag in enumerate(group):
+                encoded[row, col] = columns.get(tag, pad)
+        return encoded
+
+    def match_many(self, items: Iterable[Item], tag_space: Optional[Iterable[int]] = None,
+                   chunk_size: int = 65536) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        【暴露接口】批量匹配，结果与逐个调用match一致
+        :param items: 物品列表
+        :param tag_space: 标签空间（通常为entry.json与blacklist.json的全部ID），规则中的词条总会被包含
+        :param chunk_size: 每批处理的物品数量，用于限制内存占用
+        :return: (是否匹配, 得分, 匹配的规则下标，未匹配为-1)
+        """
+        items = list(items)
+        count = len(items)
+        matched = np.zeros(count, dtype=bool)
+        scores = np.zeros(count, dtype=np.int32)
+        rule_index = np.full(count, -1, dtype=np.int32)
+        if not count or not self._rules:
+            return matched, scores, rule_index
+
+        tags = set(tag_space or ())
+        for rule in self._rules:
+            tags |= rule.must | rule.extra | rule.ban
+        columns = {tag: col for col, tag in enumerate(sorted(tags))}
+
+        # 标签空间 x 规则 的权重矩阵与禁用矩阵，末行为填充列
+        rule_count = len(self._rules)
+        weights = np.zeros((len(columns) + 1, rule_count), dtype=np.int32)
+        bans = np.zeros((len(columns) + 1, rule_count), dtype=bool)
+        for index, rule in enumerate(self._rules):
+            for tag in rule.extra:
+                weights[columns[tag], index] = 1
+            for tag in rule.must:
+                weights[columns[tag], index] = 10
+            for tag in rule.ban:
+                bans[columns[tag], index] = True
+        thresholds = np.array(self._thresholds, dtype=np.int32)
+
+        for start in range(0, count, chunk_size):
+            chunk = items[start:start + chunk_size]
+            buff = self._encode_tags([item.buff for item in chunk], columns)
+            debuff = self._encode_tags([item.debuff for item in chunk], columns)
+
+            rule_scores = weights[buff].sum(axis=1)
+            banned = bans[debuff].any(axis=1)
+            ok = ~banned & (rule_scores >= thresholds)
+
+            rows = np.arange(len(chunk))
+            hit = ok.any(axis=1)
+            first = ok.argmax(axis=1)
+            last_score = np.where(banned[:, -1], -1, rule_scores[:, -1])
+
+            end = start + len(chunk)
+            matched[start:end] = hit
+            scores[start:end] = np.where(hit, rule_scores[rows, first], last_score)
+            rule_index[start:end] = np.where(hit, first, -1)
+        return matched, scores, rule_index
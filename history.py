@@ -0,0 +1,163 @@
+import os
+import struct
+import time
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# 列定义：(列名, array类型码, numpy类型)，每个数据块内按此顺序依次存放各列
+COLUMNS = [
+    ("session", "q", "<i8"),
+    ("seq", "q", "<i8"),
+    ("ts", "q", "<i8"),
+    ("buff0", "i", "<i4"),
+    ("buff1", "i", "<i4"),
+    ("buff2", "i", "<i4"),
+    ("debuff0", "i", "<i4"),
+    ("debuff1", "i", "<i4"),
+    ("debuff2", "i", "<i4"),
+    ("score", "i", "<i4"),
+    ("rule", "i", "<i4"),
+]
+# 每个遗物最多3个正面/负面词条，空位记为-1
+SLOTS = 3
+
+# 块头：魔数 + 行数 + 列数；块尾：结束标记 + 行数，与块头一致才认为该块完整写入
+CHUNK_MAGIC = b"RLCH"
+CHUNK_HEADER = struct.Struct("<4sII")
+CHUNK_END = b"RLCE"
+CHUNK_TRAILER = struct.Struct("<4sI")
+ROW_SIZE = sum(np.dtype(dtype).itemsize for _, _, dtype in COLUMNS)
+
+
+def _chunk_spans(data) -> Iterator[Tuple[int, int, int]]:
+    """依次给出完整数据块的(偏移, 行数, 结束偏移)，遇到第一个不完整或损坏的块即停止"""
+    size = len(data)
+    offset = 0
+    while offset + CHUNK_HEADER.size <= size:
+        magic, rows, ncols = CHUNK_HEADER.unpack_from(data, offset)
+        end = offset + CHUNK_HEADER.size + rows * ROW_SIZE + CHUNK_TRAILER.size
+        if magic != CHUNK_MAGIC or ncols != len(COLUMNS) or end > size:
+            return
+        if CHUNK_TRAILER.unpack_from(data, end - CHUNK_TRAILER.size) != (CHUNK_END, rows):
+            return
+        yield offset, rows, end
+        offset = end
+
+
+def _valid_end(path: str) -> int:
+    """文件中最后一个完整数据块的结束偏移"""
+    if not os.path.isfile(path) or os.path.getsize(path) == 0:
+        return 0
+    data = np.memmap(path, dtype=np.uint8, mode="r")
+    end = 0
+    for _, _, end in _chunk_spans(data):
+        pass
+    del data
+    return end
+
+
+class History:
+    """
+    遗物历史记录，每个遗物一行
+    行先缓存在按列存放的array中，满chunk_rows行或flush时作为一个列式数据块追加到文件末尾
+    打开时截掉末尾崩溃留下的不完整数据块，之后的数据块紧接在最后一个完整块之后
+    """
+
+    def __init__(self, path: str = "./history/relics.bin", chunk_rows: int = 4096,
+                 session: Optional[int] = None, terminal=None):
+        self.path = path
+        self.terminal = terminal
+        self.chunk_rows = chunk_rows
+        # 会话ID默认取启动时间（秒）
+        self.session = session if session is not None else int(time.time())
+        self._columns: Dict[str, array] = {name: array(code) for name, code, _ in COLUMNS}
+        self._rows = 0
+        # 最后一个完整数据块的结束偏移，写入前先截断到这里
+        self._end = _valid_end(path)
+
+    def append(self, seq: int, buff: Iterable[int], debuff: Iterable[int], score: int,
+               rule: int = -1, ts: Optional[int] = None) -> None:
+        columns = self._columns
+        columns["session"].append(self.session)
+        columns["seq"].append(seq)
+        columns["ts"].append(ts if ts is not None else time.time_ns())
+        buff = list(buff)[:SLOTS]
+        debuff = list(debuff)[:SLOTS]
+        for i in range(SLOTS):
+            columns[f"buff{i}"].append(buff[i] if i < len(buff) else -1)
+            columns[f"debuff{i}"].append(debuff[i] if i < len(debuff) else -1)
+        columns["score"].append(score)
+        columns["rule"].append(rule)
+        self._rows += 1
+        if self._rows >= self.chunk_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        """把缓存的行作为一个数据块追加写入"""
+        if not self._rows:
+            return
+        rows = self._rows
+        parts = [CHUNK_HEADER.pack(CHUNK_MAGIC, rows, len(COLUMNS))]
+        for name, _, dtype in COLUMNS:
+            parts.append(np.asarray(self._columns[name], dtype=dtype).tobytes())
+        parts.append(CHUNK_TRAILER.pack(CHUNK_END, rows))
+        # 写入失败时丢弃这一块，不让同一批行反复触发写入
+        self._columns = {name: array(code) for name, code, _ in COLUMNS}
+        self._rows = 0
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "ab") as f:
+                # 去掉上次写了一半的块
+                f.truncate(self._end)
+                f.write(b"".join(parts))
+            self._end += sum(len(part) for part in parts)
+        except OSError as e:
+            if self.terminal:
+                self.terminal.logs(f"写入{self.path}时发生错误: {e}", log_type="error")
+
+
+class HistoryReader:
+    """内存映射读取历史文件，第一个不完整或损坏的数据块及其后的内容会被忽略"""
+
+    def __init__(self, path: str = "./history/relics.bin"):
+        self.path = path
+        self._chunks: List[Dict[str, np.ndarray]] = []
+        self._map: Optional[np.memmap] = None
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            self._map = np.memmap(path, dtype=np.uint8, mode="r")
+            self._index()
+
+    def _index(self) -> None:
+        data = self._map
+        for offset, rows, _ in _chunk_spans(data):
+            position = offset + CHUNK_HEADER.size
+            chunk = {}
+            for name, _, dtype in COLUMNS:
+                chunk[name] = np.frombuffer(data, dtype=dtype, count=rows, offset=position)
+                position += rows * np.dtype(dtype).itemsize
+            self._chunks.append(chunk)
+
+    def __len__(self) -> int:
+        return sum(len(chunk["seq"]) for chunk in self._chunks)
+
+    def chunks(self) -> List[Dict[str, np.ndarray]]:
+        """逐块访问，不复制数据"""
+        return self._chunks
+
+    def column(self, name: str) -> np.ndarray:
+        """拼接所有块中的一列"""
+        if not self._chunks:
+            return np.empty(0, dtype=dict((n, d) for n, _, d in COLUMNS)[name])
+        return np.concatenate([chunk[name] for chunk in self._chunks])
+
+    def buffs(self) -> np.ndarray:
+        """N x 3 的正面词条矩阵，空位为-1"""
+        return np.stack([self.column(f"buff{i}") for i in range(SLOTS)], axis=1)
+
+    def debuffs(self) -> np.ndarray:
+        """N x 3 的负面词条矩阵，空位为-1"""
+        return np.stack([self.column(f"debuff{i}") for i in range(SLOTS)], axis=1)
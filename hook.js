@@ -9,8 +9,149 @@ function val(v) {
     return v == 0xFFFFFFFF ? null : v;
 }
 
+// 事件序号，单调递增，Python端据此检测丢失
+var seq = 0;
+
+// 高精度时间戳：优先使用QueryPerformanceCounter，与Python的time.perf_counter_ns同源
+var qpcBuf = Memory.alloc(8);
+var qpcFreq = 0;
+var qpc = null;
+try {
+    var kernel32 = Process.getModuleByName("kernel32.dll");
+    qpc = new NativeFunction(kernel32.getExportByName("QueryPerformanceCounter"), 'int', ['pointer']);
+    var qpf = new NativeFunction(kernel32.getExportByName("QueryPerformanceFrequency"), 'int', ['pointer']);
+    qpf(qpcBuf);
+    qpcFreq = qpcBuf.readS64().toNumber();
+} catch (e) {
+    qpc = null;
+}
+
+// 批量发送：batchSize<=1时逐条发送，否则写入环形缓冲区，达到数量或时间阈值后合并为一条消息
+var batchSize = 0;
+var flushMs = 20;
+var ring = [];
+var ringHead = 0;
+var ringCount = 0;
+var flushTimer = null;
+
+function flush() {
+    if (flushTimer !== null) {
+        clearTimeout(flushTimer);
+        flushTimer = null;
+    }
+    if (ringCount === 0) {
+        return;
+    }
+    var events = [];
+    for (var i = 0; i < ringCount; i++) {
+        events.push(ring[(ringHead + i) % batchSize]);
+    }
+    ringHead = (ringHead + ringCount) % batchSize;
+    ringCount = 0;
+    send({ "batch": events });
+}
+
+function emit(event) {
+    if (batchSize <= 1) {
+        send(event);
+        return;
+    }
+    ring[(ringHead + ringCount) % batchSize] = event;
+    ringCount += 1;
+    if (ringCount >= batchSize) {
+        flush();
+    } else if (flushTimer === null) {
+        flushTimer = setTimeout(flush, flushMs);
+    }
+}
+
+function timestamp() {
+    if (qpc !== null && qpcFreq > 0) {
+        qpc(qpcBuf);
+        var ticks = qpcBuf.readS64().toNumber();
+        var ns = Math.floor(ticks / qpcFreq) * 1e9 + Math.floor((ticks % qpcFreq) * 1e9 / qpcFreq);
+        return { "ts": ns, "clock": "perf" };
+    }
+    return { "ts": Date.now() * 1e6, "clock": "wall" };
+}
+
+var last_r8 = null;
+
+function attachAt(address) {
+    console.log("[HOOK]已经写入: " + address.toString(16));
+    Interceptor.attach(address, {
+        onEnter: function (args) {
+            if (this.context.rdx.toInt32() === 0) {
+                let r8 = this.context.r8.toString();
+                if (r8 === last_r8) {
+                    return;
+                }
+                last_r8 = r8;
+                try {
+                    let buff_offsets = [0x18, 0x1C, 0x20];
+                    let debuff_offsets = [0x40, 0x44, 0x48];
+                    let buff = [];
+                    let debuff = [];
+                    for (var i = 0; i < debuff_offsets.length; i++) {
+                        let buff_val = val(this.context.r8.add(buff_offsets[i]).readU32());
+                        if (buff_val !== null) {
+                            buff.push(buff_val);
+                        }
+                        let debuff_val = val(this.context.r8.add(debuff_offsets[i]).readU32());
+                        if (debuff_val !== null) {
+                            debuff.push(debuff_val);
+                        }
+                    }
+                    var now = timestamp();
+                    seq += 1;
+                    emit({ "buff": buff, "debuff": debuff, "seq": seq, "ts": now.ts, "clock": now.clock });
+                } catch (e) { }
+            }
+        }
+    });
+}
+
+// 模块标识：模块大小 + PE头中的链接时间戳，游戏更新后自动失效
+function moduleKey(m) {
+    try {
+        var peHeader = m.base.add(m.base.add(0x3C).readU32());
+        return m.size + ":" + peHeader.add(8).readU32();
+    } catch (e) {
+        return m.size + ":0";
+    }
+}
+
+// 校验缓存偏移处的字节是否与特征码一致
+function verifyAt(m, offset) {
+    if (typeof offset !== "number" || offset < 0) {
+        return false;
+    }
+    var bytes = AOB_PATTERN.split(" ");
+    if (offset + bytes.length > m.size) {
+        return false;
+    }
+    try {
+        var address = m.base.add(offset);
+        for (var i = 0; i < bytes.length; i++) {
+            if (address.add(i).readU8() !== parseInt(bytes[i], 16)) {
+                return false;
+            }
+        }
+        return true;
+    } catch (e) {
+        return false;
+    }
+}
+
 rpc.exports = {
-    init: function () {
+    ping: function () {
+        return seq;
+    },
+    init: function (options) {
+        options = options || {};
+        batchSize = options.batch_size || 0;
+        flushMs = options.flush_ms || 20;
+        ring = new Array(Math.max(batchSize, 1));
         var m = Process.enumerateModules()[0];
         var modules = Process.enumerateModules();
         for (var i = 0; i < modules.length; i++) {
@@ -19,42 +160,33 @@ rpc.exports = {
                 break;
             }
         }
-        var last_r8 = null;
-
-        Memory.scan(m.base, m.size, hexToPattern(AOB_PATTERN), {
-            onMatch: function (address, size) {
-                console.log("[HOOK]已经写入: " + address.toString(16));
-                Interceptor.attach(address, {
-                    onEnter: function (args) {
-                        if (this.context.rdx.toInt32() === 0) {
-                            let r8 = this.context.r8.toString();
-                            if (r8 === last_r8) {
-                                return;
-                            }
-                            last_r8 = r8;
-                            try {
-                                let buff_offsets = [0x18, 0x1C, 0x20];
-                                let debuff_offsets = [0x40, 0x44, 0x48];
-                                let buff = [];
-                                let debuff = [];
-                                for (var i = 0; i < debuff_offsets.length; i++) {
-                                    let buff_val = val(this.context.r8.add(buff_offsets[i]).readU32());
-                                    if (buff_val !== null) {
-                                        buff.push(buff_val);
-                                    }
-                                    let debuff_val = val(this.context.r8.add(debuff_offsets[i]).readU32());
-                                    if (debuff_val !== null) {
-                                        debuff.push(debuff_val);
-                                    }
-                                }
-                                send({ "buff": buff, "debuff": debuff });
-                            } catch (e) { }
-                        }
-                    }
-                });
-                return "stop";
-            },
-            onComplete: function () { }
+        var start = Date.now();
+        var key = moduleKey(m);
+        var cached = (options.aob_cache || {})[key];
+
+        // 优先尝试缓存的偏移，校验失败再全量扫描
+        if (verifyAt(m, cached)) {
+            attachAt(m.base.add(cached));
+            return { "path": "cache", "key": key, "offset": cached, "elapsed_ms": Date.now() - start };
+        }
+
+        return new Promise(function (resolve) {
+            var result = { "path": "none", "key": key, "offset": null, "elapsed_ms": 0 };
+            Memory.scan(m.base, m.size, hexToPattern(AOB_PATTERN), {
+                onMatch: function (address, size) {
+                    attachAt(address);
+                    result.path = "scan";
+                    result.offset = address.sub(m.base).toInt32();
+                    result.elapsed_ms = Date.now() - start;
+                    resolve(result);
+                    return "stop";
+                },
+                onError: function (reason) { },
+                onComplete: function () {
+                    result.elapsed_ms = Date.now() - start;
+                    resolve(result);
+                }
+            });
         });
     }
 };
\ No newline at end of file
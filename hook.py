@@ -1,4 +1,7 @@
+import json
 import os
+import queue
+import random
 import threading
 import time
 from typing import Callable, Optional
@@ -6,42 +9,111 @@ from typing import Callable, Optional
 import frida
 
 import terminal
+from metrics import metrics
+from script_cache import ScriptCache
 
 
 class Hook:
-    def __init__(self, terminal):
+    def __init__(self, terminal, options: Optional[dict] = None):
         self.terminal = terminal
+        # 传给hook.js的参数，batch_size>1时启用批量发送
+        self.options = options or {}
         self.process_name = "nightreign.exe"
         self.session: Optional[frida.core.Session] = None
         self.script: Optional[frida.core.Script] = None
         self.item = None
+        # 遗物事件队列，满时丢弃最旧的事件并计数
+        self._events: queue.Queue = queue.Queue(maxsize=1024)
+        self.dropped = 0
+        # 有新事件入队时通知等待者
+        self._arrived = threading.Condition()
+        # hook.js 事件序号，用于检测丢失的事件
+        self.last_seq = 0
+        self.gaps = 0
         self._running = False
         self._log_callback: Optional[Callable[[str], None]] = None
         self._should_stop = False
         self._injection_lock = threading.Lock()
+        # 渲染后的源码与编译后的字节码，跨重连、跨进程重启复用
+        self._script_cache = ScriptCache(
+            os.path.join(os.path.dirname(__file__), "hook.js"),
+            self.process_name,
+            salt=frida.__version__)
+        # 特征码偏移缓存：模块标识 -> 相对模块基址的偏移
+        self._aob_cache_path = "./cache/aob.json"
+        self.aob_result: Optional[dict] = None
+        # 会话断开（detached/destroyed）或停止时置位，唤醒重连循环
+        self._disconnected = threading.Event()
+        # 只由stop置位，重连退避在此等待，不会被已处理过的断开事件提前唤醒
+        self._stopped = threading.Event()
+        # 健康时的心跳间隔与超时（秒），重连退避的初始与最大间隔（秒）
+        self.ping_interval = self.options.get("ping_interval", 30)
+        self.ping_timeout = self.options.get("ping_timeout", 2)
+        self.backoff_base = self.options.get("backoff_base", 0.5)
+        self.backoff_max = self.options.get("backoff_max", 30)
 
     def set_logger(self, log_func: Callable[[str], None]):
         self._log_callback = log_func
 
     def _on_message(self, message, data):
         if message['type'] == 'send':
-            self.item = message['payload']
+            payload = message['payload']
+            recv_ns = time.perf_counter_ns()
+            for raw in payload.get('batch', (payload,)):
+                event = dict(raw, recv_ns=recv_ns)
+                if metrics.enabled and event.get('clock') == 'perf':
+                    metrics.record("hook.deliver", recv_ns - int(event['ts']))
+                self._track_seq(event.get('seq', 0))
+                self.item = event
+                self._put_event(event)
+            metrics.stop("hook.on_message", recv_ns if metrics.enabled else 0)
+
+    def _track_seq(self, seq):
+        # 重新注入后脚本序号从1开始，不计为丢失
+        if seq > self.last_seq + 1 and self.last_seq:
+            self.gaps += seq - self.last_seq - 1
+        self.last_seq = seq
+
+    @staticmethod
+    def latency_ns(event) -> int:
+        """从hook.js捕获事件到当前时刻的耗时（纳秒），无时间戳时返回-1"""
+        ts = event.get('ts')
+        if ts is None:
+            return -1
+        if event.get('clock') == 'perf':
+            return time.perf_counter_ns() - int(ts)
+        return time.time_ns() - int(ts)
+
+    def _put_event(self, event):
+        while True:
+            try:
+                self._events.put_nowait(event)
+                with self._arrived:
+                    self._arrived.notify_all()
+                return
+            except queue.Full:
+                try:
+                    self._events.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
 
     def _cleanup(self):
         with self._injection_lock:
-            if self.script:
+            # 先置空再卸载，主动断开触发的detached/destroyed回调不会被当作意外断开
+            script, self.script = self.script, None
+            session, self.session = self.session, None
+            if script:
                 try:
-                    self.script.unload()
+                    script.unload()
                 except:
                     pass
-                self.script = None
 
-            if self.session:
+            if session:
                 try:
-                    self.session.detach()
+                    session.detach()
                 except:
                     pass
-                self.session = None
 
     def _attach_and_inject(self) -> bool:
         """执行一次注入逻辑，成功返回True"""
@@ -49,65 +121,156 @@ class Hook:
             # 1. 附加
             self.session = frida.attach(self.process_name)
 
-            # 2. 读取脚本
-            script_path = os.path.join(os.path.dirname(__file__), "hook.js")
-            with open(script_path, "r", encoding="utf-8") as f:
-                frida_code = f.read()
-            frida_code = frida_code.replace("%s", self.process_name)
+            session = self.session
+            self._disconnected.clear()
+            session.on('detached', lambda *args: self._on_detached(session))
 
-            # 3. 创建并加载脚本
-            self.script = self.session.create_script(frida_code)
+            # 2. 创建并加载脚本（使用缓存的字节码）
+            self.script = self._script_cache.create_script(self.session)
             self.script.on('message', self._on_message)
+            self.script.on('destroyed', lambda: self._on_detached(session))
             self.script.load()
-            self.script.exports.init()
+            aob_cache = self._load_aob_cache()
+            result = self.script.exports.init({
+                "batch_size": self.options.get("batch_size", 0),
+                "flush_ms": self.options.get("flush_ms", 20),
+                "aob_cache": aob_cache,
+            })
+            self._report_aob(result, aob_cache)
 
             return True
         except Exception as e:
             self._cleanup()
             return False
 
+    def _load_aob_cache(self) -> dict:
+        try:
+            with open(self._aob_cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except Exception:
+            return {}
+
+    def _save_aob_cache(self, aob_cache: dict):
+        try:
+            os.makedirs(os.path.dirname(self._aob_cache_path), exist_ok=True)
+            temp_path = f"{self._aob_cache_path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(aob_cache, f)
+            os.replace(temp_path, self._aob_cache_path)
+        except Exception as e:
+            self.terminal.logs(f"[Hook] 写入特征码缓存失败: {e}", log_type="error")
+
+    def _report_aob(self, result, aob_cache: dict):
+        """记录特征码定位方式与耗时，全量扫描命中时更新缓存"""
+        self.aob_result = result
+        if not result:
+            return
+        path = result.get("path")
+        elapsed = result.get("elapsed_ms", 0)
+        if path == "cache":
+            self.terminal.logs(f"[Hook] 特征码命中缓存，用时 {elapsed}ms")
+        elif path == "scan":
+            self.terminal.logs(f"[Hook] 特征码全量扫描，用时 {elapsed}ms")
+            aob_cache[result["key"]] = result["offset"]
+            self._save_aob_cache(aob_cache)
+        else:
+            self.terminal.logs(f"[Hook] 未找到特征码，用时 {elapsed}ms", log_type="error")
+
+    def _on_detached(self, session):
+        # 只响应当前会话的断开事件，旧会话的回调直接忽略
+        if session is self.session:
+            self._disconnected.set()
+
+    def _ping(self) -> bool:
+        """在独立线程中调用脚本的ping导出，超时或异常视为连接已失效"""
+        script = self.script
+        if not script:
+            return False
+        result = []
+
+        def call():
+            try:
+                script.exports.ping()
+                result.append(True)
+            except Exception:
+                pass
+
+        t = threading.Thread(target=call, daemon=True)
+        t.start()
+        t.join(self.ping_timeout)
+        return bool(result)
+
+    def _backoff(self, attempt: int) -> float:
+        """指数退避，取一半固定加一半随机抖动"""
+        # 限制指数，游戏长时间未启动时attempt持续增长也不会溢出
+        delay = min(self.backoff_max, self.backoff_base * (2 ** min(attempt, 16)))
+        return delay / 2 + random.uniform(0, delay / 2)
+
     def _attach_loop(self):
         self.terminal.logs("[Hook] Hook已启动")
 
+        attempt = 0
         while not self._should_stop:
-            # 检查是否需要重连
-            needs_reconnect = False
-
-            if not self.session or not self.script:
-                needs_reconnect = True
-            else:
-                # 简单的心跳检测
-                try:
-                    # 只是检查 session 对象是否还活着，不做真的 debugger 操作
-                    # 如果进程死了，这里会抛出异常
-                    pass
-                except:
-                    needs_reconnect = True
+            if self.session and self.script:
+                # 连接健康时阻塞等待断开事件，仅在心跳间隔到期时做一次ping
+                if self._disconnected.wait(self.ping_interval):
+                    if self._should_stop:
+                        break
+                    self.terminal.logs("[Hook] 游戏连接已断开", log_type="error")
+                elif self._ping():
+                    continue
+                else:
+                    self.terminal.logs("[Hook] 心跳超时，准备重连", log_type="error")
+                self._cleanup()
+                # 断开已处理，清除后退避等待才会真正休眠
+                self._disconnected.clear()
+                attempt = 0
 
-            if needs_reconnect:
+            if attempt == 0:
                 self.terminal.logs("[Hook] 正在连接游戏...")
-                self._cleanup()
+            self._cleanup()
 
-                if self._attach_and_inject():
-                    self.terminal.logs("[Hook] 已成功连接游戏")
-                else:
-                    time.sleep(2)
+            if self._attach_and_inject():
+                self.terminal.logs("[Hook] 已成功连接游戏")
+                attempt = 0
             else:
-                time.sleep(1)
+                self._stopped.wait(self._backoff(attempt))
+                attempt += 1
 
     def start(self):
         if self._running:
             return
         self._should_stop = False
+        self._stopped.clear()
         self._running = True
         t = threading.Thread(target=self._attach_loop, daemon=True)
         t.start()
 
     def get_data(self, block=True, timeout=None):
-        return self.item
+        """取出下一个遗物事件，超时或非阻塞且队列为空时返回None"""
+        try:
+            return self._events.get(block, timeout)
+        except queue.Empty:
+            return None
+
+    def wait(self, timeout=None) -> bool:
+        """等待直到队列中有事件，不取出；超时返回False"""
+        with self._arrived:
+            return self._arrived.wait_for(lambda: not self._events.empty(), timeout)
+
+    def clear(self):
+        """丢弃队列中尚未处理的遗物事件"""
+        while True:
+            try:
+                self._events.get_nowait()
+            except queue.Empty:
+                return
 
     def stop(self):
         self._should_stop = True
         self._running = False
+        self._stopped.set()
+        self._disconnected.set()
         self._cleanup()
         self.terminal.logs("[Hook] Hook已停止")
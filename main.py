@@ -1,16 +1,20 @@
+import os
 from tkinter import messagebox
 
 import keyboard
 
 from config import Config
 from game import Game
+from history import History
 from hook import Hook
 from log import Log
+from metrics import metrics
 from reader import Reader
 from save import Save
 from task import Task
 from terminal import Terminal
 from total import Total
+from watcher import FileWatcher
 
 
 class App:
@@ -23,7 +27,10 @@ class App:
         self.save = None
         self.game = None
         self.hook = None
+        self.watcher = None
         self.total = Total(self.config)
+        metrics.enabled = self.config.get_debug_data().get("metrics", False)
+        self.history = History(terminal=self.terminal)
 
         # 初始化存档类
         try:
@@ -52,7 +59,7 @@ class App:
             f"备份存档文件: {result and '成功' or '失败'}", log_type=result and "success" or "error")
 
         # 注入钩子
-        self.hook = Hook(self.terminal)
+        self.hook = Hook(self.terminal, self.config.get_hook_data())
         self.hook.start()
 
        # 初始化游戏类
@@ -63,7 +70,7 @@ class App:
 
         # 初始化任务类
         try:
-            self.task = Task(self.config,  self.terminal, self.hook,self.reader,self.total)
+            self.task = Task(self.config,  self.terminal, self.hook,self.reader,self.total,self.history)
             self.task.load_tasks()
             self.terminal.logs(
                 f"共加载 {self.task.task_count} 个任务")
@@ -73,14 +80,20 @@ class App:
             self.log.error(err)
             self.close()
 
+        # 监视筛选、任务与调试配置，修改后自动重新加载
+        self.watcher = FileWatcher([self.config.filter_path, self.config.task_path, self.config.debug_path],
+                                   self.on_config_changed)
+        self.watcher.start()
 
        # 注册快捷键
         keyboard.add_hotkey('num 9', self.close)
         keyboard.add_hotkey('num 3', self.load_task)
         keyboard.add_hotkey('num 1', self.start)
+        keyboard.add_hotkey('num 5', self.dump_metrics)
         self.terminal.logs("-"*5 + "快捷键" + "-"*5)
         self.terminal.logs("[Num 1]  开始执行任务")
         self.terminal.logs("[Num 3]  重新加载任务")
+        self.terminal.logs("[Num 5]  输出耗时统计")
         self.terminal.logs("[Num 9]  关闭程序")
         self.terminal.logs("-"*16)
 
@@ -103,10 +116,47 @@ class App:
         self.task.execute_all_tasks(pid, hwnd)
 
     def load_task(self):
-        self.task.load_tasks()
+        try:
+            self.task.load_tasks()
+        except Exception as e:
+            self.terminal.logs(f"[任务]重新加载失败: {str(e)}", log_type="error")
+            return
         self.terminal.logs(f"[任务]重新加载: {self.task.task_count}")
 
+    def on_config_changed(self, path: str):
+        """在监视线程中调用，校验编译失败时保留当前配置"""
+        if path == os.path.abspath(self.config.filter_path):
+            try:
+                count = self.task.reload_filters()
+            except Exception as e:
+                self.terminal.logs(f"[筛选]自动重新加载失败: {str(e)}", log_type="error")
+                return
+            self.terminal.logs(f"[筛选]已自动重新加载 {count} 条规则")
+        elif path == os.path.abspath(self.config.task_path):
+            try:
+                self.task.load_tasks()
+            except Exception as e:
+                self.terminal.logs(f"[任务]自动重新加载失败: {str(e)}", log_type="error")
+                return
+            self.terminal.logs(f"[任务]已自动重新加载: {self.task.task_count}")
+        elif path == os.path.abspath(self.config.debug_path):
+            # 运行中只读缓存，在这里刷新，下一次开始运行时生效
+            debug = self.config.load_debug_data()
+            metrics.enabled = debug.get("metrics", False)
+            self.terminal.logs("[配置]已重新加载debug.json")
+
+    def dump_metrics(self):
+        self.terminal.logs("-"*5 + "耗时统计" + "-"*5)
+        for line in metrics.summary():
+            self.terminal.logs(line)
+
     def close(self):
+        if self.watcher:
+            self.watcher.stop()
+        if self.total:
+            self.total.flush(force=True)
+        if self.history:
+            self.history.flush()
         if self.terminal:
             self.terminal.logs("关闭程序", log_type="error")
             self.terminal.destroy()
@@ -114,7 +164,6 @@ class App:
         import gc
         gc.collect()
 
-        import os
         os._exit(0)
 
 if __name__ == '__main__':
@@ -0,0 +1,160 @@
+import os
+import struct
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Protocol, Tuple
+
+
+@dataclass(frozen=True)
+class ModuleInfo:
+    name: str
+    base: int
+
+
+class MemoryBackend(Protocol):
+    """Reader 使用的进程内存访问接口，读写失败时抛出异常"""
+
+    def read_bytes(self, address: int, size: int) -> bytes: ...
+
+    def read_int(self, address: int) -> int: ...
+
+    def read_longlong(self, address: int) -> int: ...
+
+    def write(self, address: int, data: bytes) -> None: ...
+
+    def list_modules(self) -> List[ModuleInfo]: ...
+
+    def close(self) -> None: ...
+
+
+class _StructMixin:
+    """基于read_bytes实现整数读取"""
+
+    def read_int(self, address: int) -> int:
+        return struct.unpack("<i", self.read_bytes(address, 4))[0]
+
+    def read_longlong(self, address: int) -> int:
+        return struct.unpack("<q", self.read_bytes(address, 8))[0]
+
+
+class PymemBackend:
+    """Windows 下基于 pymem 的实现"""
+
+    def __init__(self, pid: int):
+        import pymem
+        self.pm = pymem.Pymem(pid)
+
+    def read_bytes(self, address: int, size: int) -> bytes:
+        return self.pm.read_bytes(address, size)
+
+    def read_int(self, address: int) -> int:
+        return self.pm.read_int(address)
+
+    def read_longlong(self, address: int) -> int:
+        return self.pm.read_longlong(address)
+
+    def write(self, address: int, data: bytes) -> None:
+        self.pm.write_bytes(address, data, len(data))
+
+    def list_modules(self) -> List[ModuleInfo]:
+        return [ModuleInfo(m.name, m.lpBaseOfDll) for m in self.pm.list_modules()]
+
+    def close(self) -> None:
+        self.pm.close_process()
+
+
+class ProcMemBackend(_StructMixin):
+    """Linux 下基于 /proc/<pid>/mem 的实现，模块列表取自 /proc/<pid>/maps"""
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self._fd = os.open(f"/proc/{pid}/mem", os.O_RDWR)
+
+    def read_bytes(self, address: int, size: int) -> bytes:
+        data = os.pread(self._fd, size, address)
+        if len(data) != size:
+            raise OSError(f"short read at {address:#x}")
+        return data
+
+    def write(self, address: int, data: bytes) -> None:
+        if os.pwrite(self._fd, data, address) != len(data):
+            raise OSError(f"short write at {address:#x}")
+
+    def list_modules(self) -> List[ModuleInfo]:
+        modules: Dict[str, int] = {}
+        with open(f"/proc/{self.pid}/maps", "r", encoding="utf-8") as f:
+            for line in f:
+                parts = line.split(maxsplit=5)
+                if len(parts) < 6 or not parts[5].startswith("/"):
+                    continue
+                name = os.path.basename(parts[5].strip())
+                base = int(parts[0].split("-")[0], 16)
+                if name not in modules or base < modules[name]:
+                    modules[name] = base
+        return [ModuleInfo(name, base) for name, base in modules.items()]
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+class FakeProcess(_StructMixin):
+    """内存中的假进程，由若干bytearray区域组成，用于测试和性能分析"""
+
+    def __init__(self):
+        self._regions: List[Tuple[int, bytearray]] = []
+        self._modules: List[ModuleInfo] = []
+
+    def map(self, address: int, size: int) -> bytearray:
+        region = bytearray(size)
+        self._regions.append((address, region))
+        return region
+
+    def add_module(self, name: str, base: int) -> None:
+        self._modules.append(ModuleInfo(name, base))
+
+    def _locate(self, address: int, size: int) -> Tuple[bytearray, int]:
+        for base, region in self._regions:
+            if base <= address and address + size <= base + len(region):
+                return region, address - base
+        raise OSError(f"access violation at {address:#x}")
+
+    def read_bytes(self, address: int, size: int) -> bytes:
+        region, offset = self._locate(address, size)
+        return bytes(region[offset:offset + size])
+
+    def write(self, address: int, data: bytes) -> None:
+        region, offset = self._locate(address, len(data))
+        region[offset:offset + len(data)] = data
+
+    def list_modules(self) -> List[ModuleInfo]:
+        return list(self._modules)
+
+    def close(self) -> None:
+        pass
+
+    @classmethod
+    def nightreign(cls, anhen: int = 0, wangzheng: int = 0, quantity: int = 0,
+                   module_base: int = 0x140000000, heap_base: int = 0x20000000,
+                   name: str = "nightreign.exe") -> "FakeProcess":
+        """按 Reader 的真实偏移布置指针链：模块基址 -> 基址指针 -> 暗痕/王证，模块基址 -> 购买数量"""
+        from reader import Reader
+
+        process = cls()
+        process.add_module(name, module_base)
+        process.map(module_base + Reader.MODULE_BASE_OFFSET, 8)
+        process.map(module_base + Reader.QUANTITY_OFFSET, 4)
+        process.map(heap_base, Reader.SPAN_START + Reader.SPAN_SIZE)
+        process.write(module_base + Reader.MODULE_BASE_OFFSET, struct.pack("<q", heap_base))
+        process.write(heap_base + Reader.ANHEN_OFFSETS, struct.pack("<q", anhen))
+        process.write(heap_base + Reader.WANGZHENG_OFFSETS, struct.pack("<i", wangzheng))
+        process.write(module_base + Reader.QUANTITY_OFFSET, struct.pack("<i", quantity))
+        return process
+
+
+def open_backend(pid: int) -> Optional[MemoryBackend]:
+    """按平台打开默认的内存后端，失败返回None"""
+    try:
+        if os.name == "nt":
+            return PymemBackend(pid)
+        return ProcMemBackend(pid)
+    except Exception:
+        return None
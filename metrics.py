@@ -0,0 +1,107 @@
+import threading
+import time
+from typing import Dict, List
+
+# 每个2的幂区间再细分为16个子桶，相对误差约6%
+SUB_BUCKET_BITS = 4
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+
+
+class Histogram:
+    """对数分桶的延迟直方图（HDR风格），记录纳秒值，内存占用与样本数无关"""
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+    @staticmethod
+    def _index(value: int) -> int:
+        magnitude = max(0, value.bit_length() - SUB_BUCKET_BITS - 1)
+        return (magnitude << SUB_BUCKET_BITS) + (value >> magnitude)
+
+    @staticmethod
+    def _lower_bound(index: int) -> int:
+        magnitude = max(0, (index >> SUB_BUCKET_BITS) - 1)
+        return (index - (magnitude << SUB_BUCKET_BITS)) << magnitude
+
+    def record(self, value: int) -> None:
+        if value < 0:
+            value = 0
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        if not self.count or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self.count += 1
+        self.total += value
+
+    def percentile(self, percent: float) -> int:
+        """返回百分位所在桶的下界"""
+        if not self.count:
+            return 0
+        target = max(1, int(self.count * percent / 100 + 0.5))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(max(self._lower_bound(index), self.min), self.max)
+        return self.max
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+class Metrics:
+    """
+    热路径各阶段的延迟统计
+    未启用时start返回0，stop直接返回，调用方无需判断
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._histograms: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def start(self) -> int:
+        return time.perf_counter_ns() if self.enabled else 0
+
+    def stop(self, stage: str, start: int) -> None:
+        if not start:
+            return
+        self.record(stage, time.perf_counter_ns() - start)
+
+    def record(self, stage: str, value: int) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = Histogram()
+            histogram.record(value)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms = {}
+
+    def summary(self) -> List[str]:
+        """每个阶段一行：次数、均值、p50/p90/p99、最大值（毫秒）"""
+        with self._lock:
+            histograms = dict(self._histograms)
+        if not histograms:
+            return ["[统计]暂无数据" if self.enabled else "[统计]未启用，请在debug.json中设置metrics为true"]
+        lines = []
+        for stage in sorted(histograms):
+            h = histograms[stage]
+            lines.append(
+                f"{stage}: n={h.count} avg={h.mean() / 1e6:.3f} "
+                f"p50={h.percentile(50) / 1e6:.3f} p90={h.percentile(90) / 1e6:.3f} "
+                f"p99={h.percentile(99) / 1e6:.3f} max={h.max / 1e6:.3f}ms")
+        return lines
+
+
+# 全局统计实例
+metrics = Metrics()
@@ -0,0 +1,154 @@
+from functools import partial
+from typing import Callable, Dict, List, Optional, Tuple
+
+STEP_TYPES = ("key", "filter", "get", "set", "group")
+
+
+class TaskConfigError(ValueError):
+    """task.json 配置错误，在加载时抛出"""
+
+
+class Actions:
+    """筛选结果对应的按键动作，按键已转为小写"""
+    __slots__ = ("tips", "keys", "interval")
+
+    def __init__(self, tips: str, keys: Tuple[str, ...], interval: float):
+        self.tips = tips
+        self.keys = keys
+        self.interval = interval
+
+
+class FilterData:
+    """筛选步骤的预解析配置"""
+    __slots__ = ("success", "failure", "timeout")
+
+    def __init__(self, success: Actions, failure: Actions, timeout: float):
+        self.success = success
+        self.failure = failure
+        self.timeout = timeout
+
+
+class Until:
+    """分组的提前结束条件，每轮结束后检查，未设置的条件为None"""
+    __slots__ = ("matches", "anhen_below")
+
+    def __init__(self, matches: Optional[int] = None, anhen_below: Optional[int] = None):
+        self.matches = matches
+        self.anhen_below = anhen_below
+
+
+class Step:
+    """编译后的任务步骤，handler为已绑定参数的处理函数"""
+    __slots__ = ("type", "tips", "delay", "times", "handler", "wake", "data", "children")
+
+    def __init__(self, type: str, tips: str, delay: float, times: int,
+                 handler: Optional[Callable[[], None]], wake: Optional[Callable[[float], bool]] = None,
+                 data: Optional[FilterData] = None, children: Optional[List["Step"]] = None):
+        self.type = type
+        self.tips = tips
+        self.delay = delay
+        self.times = times
+        self.handler = handler
+        self.wake = wake
+        self.data = data
+        self.children = children
+
+
+def _number(task: Dict, name: str, default: float, where: str, minimum: float = 0) -> float:
+    value = task.get(name, default)
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value < minimum:
+        raise TaskConfigError(f"{where}: {name} 必须是不小于{minimum}的数字，当前为 {value!r}")
+    return value
+
+
+def _actions(data: Dict, name: str, where: str) -> Actions:
+    actions = data.get(name)
+    if not isinstance(actions, dict):
+        raise TaskConfigError(f"{where}: 缺少 data.{name}")
+    keys = actions.get("key", [])
+    if not isinstance(keys, list) or not all(isinstance(key, str) and key for key in keys):
+        raise TaskConfigError(f"{where}: data.{name}.key 必须是按键字符串列表")
+    interval = _number(actions, "interval", 0, f"{where} data.{name}")
+    return Actions(actions.get("tips", ""), tuple(key.lower() for key in keys), interval)
+
+
+def compile_filter_data(data: Dict, where: str = "filter") -> FilterData:
+    if not isinstance(data, dict):
+        raise TaskConfigError(f"{where}: data 必须是对象")
+    return FilterData(
+        _actions(data, "success", where),
+        _actions(data, "failure", where),
+        _number(data, "timeout", 10, f"{where} data"))
+
+
+def compile_until(until: Optional[Dict], where: str) -> Optional[Until]:
+    """解析until：matches为本组内累计匹配次数达到N时结束，anhen_below为暗痕低于X时结束"""
+    if until is None:
+        return None
+    if not isinstance(until, dict):
+        raise TaskConfigError(f"{where}: until 必须是对象")
+    unknown = set(until) - {"matches", "anhen_below"}
+    if unknown:
+        raise TaskConfigError(f"{where}: until 不支持 {', '.join(sorted(unknown))}")
+    matches = until.get("matches")
+    if matches is not None:
+        matches = int(_number(until, "matches", 1, f"{where} until", minimum=1))
+    anhen_below = until.get("anhen_below")
+    if anhen_below is not None:
+        anhen_below = _number(until, "anhen_below", 0, f"{where} until")
+    return Until(matches, anhen_below)
+
+
+def compile_step(task, raw: Dict, where: str) -> Step:
+    """校验一个任务字典并绑定到task的处理方法"""
+    if not isinstance(raw, dict):
+        raise TaskConfigError(f"{where}: 任务必须是对象")
+    step_type = raw.get("type")
+    if step_type not in STEP_TYPES:
+        raise TaskConfigError(f"{where}: 未知的任务类型 {step_type!r}")
+    delay = _number(raw, "delay", 0, where)
+    times = max(1, int(_number(raw, "times", 1, where)))
+    tips = raw.get("tips", "无提示")
+
+    wake = None
+    data = None
+    children = None
+    if step_type == "key":
+        key = raw.get("key")
+        if not isinstance(key, str) or not key:
+            raise TaskConfigError(f"{where}: key 任务缺少按键")
+        handler = partial(task._task_key, times, key.lower())
+    elif step_type == "filter":
+        data = compile_filter_data(raw.get("data", {}), where)
+        handler = partial(task._run_filter, times, delay, data)
+        # 筛选步骤在遗物到达时提前唤醒，不必等满delay
+        wake = task.hook.wait
+    elif step_type == "get":
+        handler = task._task_get
+    elif step_type == "set":
+        handler = task._task_set
+    else:
+        children = compile_plan(task, raw.get("tasks", []), f"{where}-")
+        until = compile_until(raw.get("until"), where)
+        handler = partial(task._run_group, times, children, until)
+    return Step(step_type, tips, delay, times, handler, wake, data, children)
+
+
+def compile_plan(task, tasks: List[Dict], prefix: str = "") -> List[Step]:
+    """把task.json中的任务列表编译为步骤列表，配置错误时抛出TaskConfigError"""
+    if not isinstance(tasks, list):
+        raise TaskConfigError(f"{prefix}tasks 必须是列表")
+    return [compile_step(task, raw, f"{prefix}第{index + 1}个任务") for index, raw in enumerate(tasks)]
+
+
+def count_steps(plan: List[Step]) -> int:
+    """步骤总数，分组计入自身及其全部子步骤"""
+    return sum(1 + count_steps(step.children or []) for step in plan)
+
+
+def iter_steps(plan: List[Step]):
+    """深度优先遍历全部步骤"""
+    for step in plan:
+        yield step
+        if step.children:
+            yield from iter_steps(step.children)
@@ -1,6 +1,16 @@
+import struct
+from dataclasses import dataclass
 from typing import Callable, Optional, Tuple, Union
 
-import pymem
+from memory import MemoryBackend, open_backend
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """一次读取得到的资源数值，读取失败的字段为-1"""
+    anhen: int = -1
+    wangzheng: int = -1
+    quantity: int = -1
 
 
 class Reader:
@@ -9,25 +19,28 @@ class Reader:
     WANGZHENG_OFFSETS = 0x4BC
     QUANTITY_OFFSET = 0x39AA448
 
-    def __init__(self, pid: Optional[int] = None, exe_module_name: str = ""):
+    # 覆盖王证(int)与暗痕(longlong)的连续内存区间，snapshot一次读取
+    SPAN_START = min(ANHEN_OFFSETS, WANGZHENG_OFFSETS)
+    SPAN_SIZE = max(ANHEN_OFFSETS + 8, WANGZHENG_OFFSETS + 4) - SPAN_START
+
+    def __init__(self, pid: Optional[int] = None, exe_module_name: str = "",
+                 backend: Optional[MemoryBackend] = None):
         self.pid: Optional[int] = pid
         self.exe_module_name: str = exe_module_name.lower()
-        self.pm: Optional[pymem.Pymem] = None
+        self.backend: Optional[MemoryBackend] = None
         self._cached_exe_base: Optional[int] = None
         self._cached_anhen_ptr: Optional[int] = None
         self._cached_wangzheng_ptr: Optional[int] = None
         self._cached_quantity_ptr: Optional[int] = None
-        self.resetPID(pid)
+        self.resetPID(pid, backend)
     
-    def resetPID(self, pid: Optional[int] = None) -> None:
+    def resetPID(self, pid: Optional[int] = None, backend: Optional[MemoryBackend] = None) -> None:
+        """切换目标进程，未传入backend时按平台打开默认后端"""
         self.pid = pid
-        self.pm = None
+        self.backend = backend
         self._clear_cache()
-        if pid:
-            try:
-                self.pm = pymem.Pymem(pid)
-            except Exception:
-                self.pm = None
+        if backend is None and pid:
+            self.backend = open_backend(pid)
 
     def _clear_cache(self) -> None:
         self._cached_exe_base = None
@@ -38,25 +51,25 @@ class Reader:
     def _get_module_base(self) -> Optional[int]:
         if self._cached_exe_base:
             try:
-                self.pm.read_bytes(self._cached_exe_base, 1)
+                self.backend.read_bytes(self._cached_exe_base, 1)
                 return self._cached_exe_base
             except Exception:
                 self._cached_exe_base = None
         
-        if not self.pm:
+        if not self.backend:
             return None
         
         try:
-            for m in self.pm.list_modules():
+            for m in self.backend.list_modules():
                 if self.exe_module_name in m.name.lower():
-                    self._cached_exe_base = m.lpBaseOfDll
+                    self._cached_exe_base = m.base
                     return self._cached_exe_base
             return None
         except Exception:
             return None
     
     def _read_memory(self, offset: int, use_pointer: bool = True, read_int: bool = False) -> Tuple[Optional[int], int]:
-        if not self.pm:
+        if not self.backend:
             return (None, -1)
         
         exe_base = self._get_module_base()
@@ -65,7 +78,7 @@ class Reader:
         
         try:
             if use_pointer:
-                base_ptr = self.pm.read_longlong(exe_base + self.MODULE_BASE_OFFSET)
+                base_ptr = self.backend.read_longlong(exe_base + self.MODULE_BASE_OFFSET)
                 if base_ptr == 0:
                     return (None, -1)
                 target_ptr = base_ptr + offset
@@ -73,9 +86,9 @@ class Reader:
                 target_ptr = exe_base + offset
             
             if read_int:
-                value = self.pm.read_int(target_ptr)
+                value = self.backend.read_int(target_ptr)
             else:
-                value = self.pm.read_longlong(target_ptr)
+                value = self.backend.read_longlong(target_ptr)
             return (target_ptr, value)
         except Exception:
             return (None, -1)
@@ -101,6 +114,44 @@ class Reader:
         self._cached_quantity_ptr = ptr
         return value
     
+    def _resolve_module_base(self) -> Optional[int]:
+        """返回模块基址，已缓存时不做探测读取，由后续读取失败来发现失效"""
+        if self._cached_exe_base:
+            return self._cached_exe_base
+        return self._get_module_base()
+
+    def _read_snapshot(self, exe_base: int) -> Snapshot:
+        base_ptr = self.backend.read_longlong(exe_base + self.MODULE_BASE_OFFSET)
+        if base_ptr == 0:
+            raise ValueError("base pointer is null")
+        span_ptr = base_ptr + self.SPAN_START
+        span = memoryview(self.backend.read_bytes(span_ptr, self.SPAN_SIZE))
+        anhen = struct.unpack_from("<q", span, self.ANHEN_OFFSETS - self.SPAN_START)[0]
+        wangzheng = struct.unpack_from("<i", span, self.WANGZHENG_OFFSETS - self.SPAN_START)[0]
+        quantity_ptr = exe_base + self.QUANTITY_OFFSET
+        quantity = self.backend.read_int(quantity_ptr)
+
+        self._cached_anhen_ptr = base_ptr + self.ANHEN_OFFSETS
+        self._cached_wangzheng_ptr = base_ptr + self.WANGZHENG_OFFSETS
+        self._cached_quantity_ptr = quantity_ptr
+        return Snapshot(anhen, wangzheng, quantity)
+
+    def snapshot(self) -> Snapshot:
+        """一次性读取暗痕、王证和购买数量：基址只解析一次，两个指针值合并为一次read_bytes"""
+        if not self.backend:
+            return Snapshot()
+
+        for _ in range(2):
+            exe_base = self._resolve_module_base()
+            if not exe_base:
+                break
+            try:
+                return self._read_snapshot(exe_base)
+            except Exception:
+                # 缓存的基址可能已失效，清空后重新解析一次
+                self._clear_cache()
+        return Snapshot()
+
     def _set_value(self, value: Union[int, float], cached_ptr: Optional[int], 
                    get_method: Callable[[], int]) -> bool:
         if not isinstance(value, (int, float)):
@@ -110,7 +161,7 @@ class Reader:
         if value < 0:
             return False
         
-        if not self.pm:
+        if not self.backend:
             return False
         
         if 'anhen' in get_method.__name__:
@@ -130,11 +181,11 @@ class Reader:
         
         if cached_ptr:
             try:
-                self.pm.read_bytes(cached_ptr, 1)
+                self.backend.read_bytes(cached_ptr, 1)
                 if 'wangzheng' in get_method.__name__ or 'quantity' in get_method.__name__:
-                    self.pm.write_int(cached_ptr, value)
+                    self.backend.write(cached_ptr, struct.pack("<i", value))
                 else:
-                    self.pm.write_longlong(cached_ptr, value)
+                    self.backend.write(cached_ptr, struct.pack("<q", value))
                 return True
             except Exception:
                 setattr(self, cache_attr, None)
@@ -148,8 +199,8 @@ class Reader:
         return self._set_value(value, self._cached_wangzheng_ptr, self.get_wangzheng)
     
     def close(self) -> None:
-        if self.pm:
+        if self.backend:
             try:
-                self.pm.close_process()
+                self.backend.close()
             except Exception:
                 pass
\ No newline at end of file
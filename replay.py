@@ -0,0 +1,197 @@
+import argparse
+import contextlib
+import json
+import os
+import time
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from affix import affix_ids
+from config import Config
+from filter import Filter, Item
+from history import SLOTS, HistoryReader
+from plan import FilterData, Step, iter_steps
+from task import Task
+
+
+class NullTerminal:
+    """回放时不显示日志"""
+
+    def logs(self, message, log_type=None):
+        pass
+
+
+class RecordingSink:
+    """代替pydirectinput记录按键"""
+
+    def __init__(self):
+        self.keys: Counter = Counter()
+        self.count = 0
+
+    def press(self, key: str) -> None:
+        self.keys[key] += 1
+        self.count += 1
+
+
+class ReplayHook:
+    """按顺序提供录制的遗物事件，接口与Hook.get_data一致，事件耗尽后返回None"""
+
+    def __init__(self, events: Iterable[Dict]):
+        self._events: Iterator[Dict] = iter(events)
+
+    def get_data(self, block=True, timeout=None):
+        return next(self._events, None)
+
+    def wait(self, timeout=None) -> bool:
+        return True
+
+    def clear(self):
+        pass
+
+    @staticmethod
+    def latency_ns(event) -> int:
+        return -1
+
+
+class ReplayTotal:
+    """只在内存中计数，回放不修改total.json"""
+
+    def __init__(self):
+        self.total: Counter = Counter()
+
+    def add(self, item_id):
+        self.total[item_id] += 1
+
+    def flush(self, force: bool = False):
+        pass
+
+    def get_all(self):
+        return self.total
+
+
+class RecordingFilter:
+    """包装Filter，记录每次匹配的规则与得分"""
+
+    def __init__(self, filter: Filter):
+        self.filter = filter
+        self.rule_hits: Counter = Counter()
+        self.scores: Counter = Counter()
+        self.matched = 0
+
+    def match_rule(self, item: Item):
+        matched, score, rule_index = self.filter.match_rule(item)
+        self.scores[score] += 1
+        if matched:
+            self.matched += 1
+            self.rule_hits[rule_index] += 1
+        return matched, score, rule_index
+
+    def match(self, item: Item):
+        matched, score, _ = self.match_rule(item)
+        return matched, score
+
+
+def load_events(path: str) -> List[Dict]:
+    """读取录制的事件：History的.bin文件，或每行一个{"buff": [...], "debuff": [...]}的JSON文件"""
+    if path.endswith(".bin"):
+        reader = HistoryReader(path)
+        events = []
+        for chunk in reader.chunks():
+            buffs = [chunk[f"buff{i}"].tolist() for i in range(SLOTS)]
+            debuffs = [chunk[f"debuff{i}"].tolist() for i in range(SLOTS)]
+            seqs = chunk["seq"].tolist()
+            for row, seq in enumerate(seqs):
+                events.append({
+                    "buff": [column[row] for column in buffs if column[row] != -1],
+                    "debuff": [column[row] for column in debuffs if column[row] != -1],
+                    "seq": seq,
+                })
+        return events
+
+    events = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                event = json.loads(line)
+                # JSON边界：兼容字符串形式的词条ID
+                event["buff"] = affix_ids(event.get("buff", []))
+                event["debuff"] = affix_ids(event.get("debuff", []))
+                events.append(event)
+    return events
+
+
+def find_filter_data(plan: List[Step]) -> Optional[FilterData]:
+    """取编译后计划中第一个筛选步骤的配置"""
+    for step in iter_steps(plan):
+        if step.type == "filter":
+            return step.data
+    return None
+
+
+def replay(events: List[Dict], filters_path: Optional[str] = None, task_path: Optional[str] = None) -> Dict:
+    """用录制的事件驱动Task的筛选逻辑，返回统计结果"""
+    terminal = NullTerminal()
+    config = Config(terminal)
+    if filters_path:
+        config.filter_path = filters_path
+    if task_path:
+        config.task_path = task_path
+
+    sink = RecordingSink()
+    task = Task(config, terminal, ReplayHook(events), None, ReplayTotal())
+    task.press = sink.press
+    task.load_tasks()
+    recorder = RecordingFilter(task.filter)
+    task.filter = recorder
+    data = find_filter_data(task.plan)
+    if data is None:
+        raise ValueError("任务配置中没有筛选任务")
+
+    start = time.perf_counter()
+    # _task_filter逐条print，回放时丢弃
+    with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+        task._task_filter(len(events), 0, data)
+    elapsed = time.perf_counter() - start
+
+    rules = recorder.filter._rules
+    return {
+        "relics": len(events),
+        "matched": recorder.matched,
+        "seconds": elapsed,
+        "relics_per_second": len(events) / elapsed if elapsed > 0 else 0.0,
+        "rule_hits": {rules[index].name if index < len(rules) else str(index): count
+                      for index, count in sorted(recorder.rule_hits.items())},
+        "scores": dict(sorted(recorder.scores.items())),
+        "keys": dict(sink.keys),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="离线回放录制的遗物事件，评估筛选配置")
+    parser.add_argument("events", help="History的.bin文件或JSON Lines事件文件")
+    parser.add_argument("--filters", default=None, help="筛选配置，默认config/filters.json")
+    parser.add_argument("--tasks", default=None, help="任务配置，默认config/task.json")
+    parser.add_argument("--json", action="store_true", help="以JSON输出统计结果")
+    args = parser.parse_args()
+
+    result = replay(load_events(args.events), args.filters, args.tasks)
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=4))
+        return
+
+    print(f"遗物数: {result['relics']}  匹配: {result['matched']}")
+    print(f"耗时: {result['seconds']:.3f}s  吞吐: {result['relics_per_second']:.0f}/s")
+    print("-" * 5 + "规则命中" + "-" * 5)
+    for name, count in result["rule_hits"].items():
+        print(f"{name}: {count}")
+    print("-" * 5 + "得分分布" + "-" * 5)
+    for score, count in result["scores"].items():
+        print(f"{score}: {count}")
+    print("-" * 5 + "按键" + "-" * 5)
+    for key, count in result["keys"].items():
+        print(f"{key}: {count}")
+
+
+if __name__ == "__main__":
+    main()
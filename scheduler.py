@@ -0,0 +1,56 @@
+import time
+from typing import Callable, Optional
+
+# 最后这段时间忙等，弥补time.sleep的唤醒误差（Windows默认约15ms）
+SPIN = 0.002
+
+
+def sleep_until(deadline: float, spin: float = SPIN) -> None:
+    """睡眠到perf_counter时刻deadline"""
+    while True:
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            return
+        if remaining > spin:
+            time.sleep(remaining - spin)
+
+
+class Scheduler:
+    """
+    基于单调时钟的步骤调度
+    每一步的截止时刻 = 上一步的计划时刻 + 上一步执行耗时 + delay，
+    睡眠多出来的时间不会累积到后续步骤；可传入wake在截止前被事件提前唤醒
+    """
+
+    def __init__(self, spin: float = SPIN, max_catchup: float = 0.05):
+        self.spin = spin
+        # 落后计划时最多追赶的时间，避免一次长时间卡顿把后续延时全部吃掉
+        self.max_catchup = max_catchup
+        self._planned = time.perf_counter()
+        self._woke_at = self._planned
+
+    def start(self) -> None:
+        self._planned = time.perf_counter()
+        self._woke_at = self._planned
+
+    def wait(self, delay: float, wake: Optional[Callable[[float], bool]] = None) -> bool:
+        """
+        等待到本步骤的截止时刻，返回是否被提前唤醒
+        :param wake: wake(timeout)在超时前等到事件时返回True
+        """
+        deadline = self._planned + max(0.0, delay)
+        early = False
+        remaining = deadline - time.perf_counter()
+        if remaining > 0:
+            if wake is not None and wake(remaining):
+                early = True
+            else:
+                sleep_until(deadline, self.spin)
+        now = time.perf_counter()
+        self._planned = now if early else max(deadline, now - self.max_catchup)
+        self._woke_at = now
+        return early
+
+    def done(self) -> None:
+        """步骤执行完毕，把执行耗时计入计划时刻"""
+        self._planned += time.perf_counter() - self._woke_at
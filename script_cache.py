@@ -0,0 +1,97 @@
+import hashlib
+import os
+from typing import Dict, Optional
+
+
+class ScriptCache:
+    """
+    hook.js 脚本缓存
+    渲染后的源码按文件mtime/size缓存，编译后的字节码按内容哈希缓存在内存和磁盘，
+    重连或重启程序后可直接从字节码创建脚本，无需重新编译
+    """
+
+    def __init__(self, script_path: str, process_name: str, cache_dir: str = "./cache/script", salt: str = ""):
+        self.script_path = script_path
+        self.process_name = process_name
+        self.cache_dir = cache_dir
+        # 参与哈希的额外内容（如frida版本），版本变化后旧字节码自动失效
+        self.salt = salt
+        self._source: Optional[str] = None
+        self._source_stat = None
+        self._key: Optional[str] = None
+        self._bytecode: Dict[str, bytes] = {}
+
+    def source(self) -> str:
+        """渲染后的脚本源码，文件未变化时直接返回缓存"""
+        stat = os.stat(self.script_path)
+        stat_key = (stat.st_mtime_ns, stat.st_size)
+        if self._source is None or self._source_stat != stat_key:
+            with open(self.script_path, "r", encoding="utf-8") as f:
+                source = f.read().replace("%s", self.process_name)
+            self._source = source
+            self._source_stat = stat_key
+            self._key = hashlib.sha256((self.salt + "\0" + source).encode("utf-8")).hexdigest()
+        return self._source
+
+    def key(self) -> str:
+        self.source()
+        return self._key
+
+    def _cache_file(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.qjs")
+
+    def _load_bytecode(self, key: str) -> Optional[bytes]:
+        if key in self._bytecode:
+            return self._bytecode[key]
+        try:
+            with open(self._cache_file(key), "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        if data:
+            self._bytecode[key] = data
+            return data
+        return None
+
+    def _store_bytecode(self, key: str, data: bytes) -> None:
+        self._bytecode[key] = data
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._cache_file(key)
+            temp_path = f"{path}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except OSError:
+            pass
+
+    def _drop_bytecode(self, key: str) -> None:
+        self._bytecode.pop(key, None)
+        try:
+            os.remove(self._cache_file(key))
+        except OSError:
+            pass
+
+    def bytecode(self, session) -> Optional[bytes]:
+        """获取脚本字节码，缓存未命中时用session编译并写入缓存，不支持编译时返回None"""
+        source = self.source()
+        key = self._key
+        data = self._load_bytecode(key)
+        if data is not None:
+            return data
+        try:
+            data = session.compile_script(source, name="hook")
+        except Exception:
+            return None
+        self._store_bytecode(key, data)
+        return data
+
+    def create_script(self, session):
+        """创建脚本：优先使用缓存的字节码，失败时删除该缓存并回退到源码"""
+        data = self.bytecode(session)
+        if data is not None:
+            try:
+                return session.create_script_from_bytes(data, name="hook")
+            except Exception:
+                self._drop_bytecode(self._key)
+        return session.create_script(self.source(), name="hook")
@@ -1,23 +1,31 @@
-import json
+import copy
 import tkinter as tk
 from pathlib import Path
 from tkinter import messagebox, ttk
 
+from affix import affix_id, affix_ids
+from entries import open_table
+from store import JsonStore
+
+# 搜索框停止输入多久后刷新池子（毫秒）
+SEARCH_DEBOUNCE_MS = 150
+
 
 class ConfigManager:
     """配置管理器，负责读取和管理配置文件"""
     def __init__(self):
         self.config_path = Path("config/config.json")
+        # 配置、构筑和词条文件共用一个按(mtime, size)失效的缓存存储
+        self.store = JsonStore({"config": str(self.config_path)},
+                               on_error=lambda message: messagebox.showerror("错误", message))
         self.config = self.load_config()
+        default_paths = self.get_default_config()["file_paths"]
+        for key in ("filters", "entries", "blacklist"):
+            self.store.set_path(key, self.get(f"file_paths.{key}") or default_paths[key])
     
     def load_config(self):
         """加载配置文件"""
-        try:
-            with open(self.config_path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception as e:
-            messagebox.showerror("错误", f"读取配置文件失败: {e}")
-            return self.get_default_config()
+        return self.store.get("config", self.get_default_config())
     
     def get_default_config(self):
         """获取默认配置"""
@@ -224,9 +232,51 @@ class BuildSelector:
             return self.current_index
 
 
+class SearchIndex:
+    """词条搜索索引，按"ID + 词条名"的单字与二元组建立倒排表，查询时只校验候选词条"""
+    def __init__(self, entries):
+        # 词条ID -> Treeview行的值，按词条表原始顺序
+        self.rows = {}
+        self._texts = {}
+        self._grams = {}
+        for entry_id, entry_data in entries.items():
+            name = entry_data.get("name", "")
+            self.rows[entry_id] = (entry_id, name, entry_data.get("superposability", ""))
+            # 分隔符无法输入，关键字不会跨越ID和词条名匹配
+            text = f"{entry_id}\0{name.lower()}"
+            self._texts[entry_id] = text
+            for gram in self._split(text) | set(text):
+                self._grams.setdefault(gram, set()).add(entry_id)
+        self.order = list(self.rows)
+        self._last_keyword = ""
+        self._last_result = None
+
+    @staticmethod
+    def _split(text):
+        return {text[i:i + 2] for i in range(len(text) - 1)}
+
+    def search(self, keyword):
+        """返回ID或词条名包含关键字的词条ID集合，关键字为空时返回None表示全部"""
+        if not keyword:
+            return None
+        if keyword == self._last_keyword:
+            return self._last_result
+        if self._last_keyword and self._last_keyword in keyword:
+            # 继续输入时结果只会缩小，在上一次的结果中筛选
+            candidates = self._last_result
+        else:
+            grams = self._split(keyword) if len(keyword) > 1 else {keyword}
+            sets = sorted((self._grams.get(gram, set()) for gram in grams), key=len)
+            candidates = set.intersection(*sets)
+        result = {entry_id for entry_id in candidates if keyword in self._texts[entry_id]}
+        self._last_keyword = keyword
+        self._last_result = result
+        return result
+
+
 class PoolBase:
     """池子基类，提取EntryPool和BuildPool的共同代码"""
-    def __init__(self, parent, entries, blacklist, filter_data, type_var, search_var, on_double_click):
+    def __init__(self, parent, entries: SearchIndex, blacklist: SearchIndex, filter_data, type_var, search_var, on_double_click):
         self.parent = parent
         self.entries = entries
         self.blacklist = blacklist
@@ -283,6 +333,23 @@ class PoolBase:
     def focus(self, item):
         """设置焦点项"""
         self.tree.focus(item)
+    
+    def _render(self, ids, index):
+        """按目标ID列表增量更新Treeview：只删除多余的行、插入缺少的行，保留的行不重建"""
+        wanted = [str(entry_id) for entry_id in ids]
+        wanted_set = set(wanted)
+        current = self.tree.get_children()
+        stale = [iid for iid in current if iid not in wanted_set]
+        if stale:
+            self.tree.delete(*stale)
+        existing = set(current).difference(stale)
+        for position, (entry_id, iid) in enumerate(zip(ids, wanted)):
+            if iid not in existing:
+                self.tree.insert("", position, iid=iid, values=index.rows.get(entry_id, (entry_id, "", "")))
+        # 保留的行相对顺序变化时（如切换类型）再逐个移动
+        if list(self.tree.get_children()) != wanted:
+            for position, iid in enumerate(wanted):
+                self.tree.move(iid, "", position)
 
 
 class EntryPool(PoolBase):
@@ -292,39 +359,21 @@ class EntryPool(PoolBase):
     
     def update(self):
         """更新词条池子内容"""
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
         current_type = self.type_var.get()
         search_keyword = self.search_var.get().lower()
         
         if current_type == "ban":
-            for entry_id, entry_data in self.blacklist.items():
-                if entry_id not in self.filter_data.get(current_type, []):
-                    if not search_keyword or search_keyword in entry_id or search_keyword in entry_data.get("name", "").lower():
-                        self.tree.insert("", tk.END, iid=entry_id, values=(
-                            entry_id, 
-                            entry_data.get("name", ""), 
-                            entry_data.get("superposability", "")
-                        ))
+            index = self.blacklist
+            excluded = set(self.filter_data.get("ban", []))
         else:
-            for entry_id, entry_data in self.entries.items():
-                if current_type == "must":
-                    if entry_id not in self.filter_data.get("must", []) and entry_id not in self.filter_data.get("extra", []):
-                        if not search_keyword or search_keyword in entry_id or search_keyword in entry_data.get("name", "").lower():
-                            self.tree.insert("", tk.END, iid=entry_id, values=(
-                                entry_id, 
-                                entry_data.get("name", ""), 
-                                entry_data.get("superposability", "")
-                            ))
-                elif current_type == "extra":
-                    if entry_id not in self.filter_data.get("must", []) and entry_id not in self.filter_data.get("extra", []):
-                        if not search_keyword or search_keyword in entry_id or search_keyword in entry_data.get("name", "").lower():
-                            self.tree.insert("", tk.END, iid=entry_id, values=(
-                                entry_id, 
-                                entry_data.get("name", ""), 
-                                entry_data.get("superposability", "")
-                            ))
+            # 必选和可选互斥，两者中已有的词条都不显示
+            index = self.entries
+            excluded = set(self.filter_data.get("must", [])) | set(self.filter_data.get("extra", []))
+        
+        matches = index.search(search_keyword)
+        ids = [entry_id for entry_id in index.order
+               if entry_id not in excluded and (matches is None or entry_id in matches)]
+        self._render(ids, index)
 
 
 class BuildPool(PoolBase):
@@ -334,25 +383,18 @@ class BuildPool(PoolBase):
     
     def update(self):
         """更新构筑池子内容"""
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
         current_type = self.type_var.get()
         search_keyword = self.search_var.get().lower()
-        
-        current_pool = self.filter_data.get(current_type, [])
-        for entry_id in current_pool:
-            if current_type == "ban":
-                entry_data = self.blacklist.get(entry_id, {})
-            else:
-                entry_data = self.entries.get(entry_id, {})
-            
-            if not search_keyword or search_keyword in entry_id or search_keyword in entry_data.get("name", "").lower():
-                self.tree.insert("", tk.END, iid=entry_id, values=(
-                    entry_id, 
-                    entry_data.get("name", ""), 
-                    entry_data.get("superposability", "")
-                ))
+        index = self.blacklist if current_type == "ban" else self.entries
+        
+        matches = index.search(search_keyword)
+        ids = []
+        for entry_id in dict.fromkeys(self.filter_data.get(current_type, [])):
+            # 词条表中没有的ID只按ID匹配
+            if (matches is None or entry_id in matches
+                    or (entry_id not in index.rows and search_keyword in str(entry_id))):
+                ids.append(entry_id)
+        self._render(ids, index)
 
 
 class DetailView:
@@ -405,7 +447,6 @@ class MainApp:
             return
         
         # 读取filters.json文件
-        self.filters_path = Path(config_manager.get("file_paths.filters"))
         self.filters = self.load_filters()
         
         # 如果没有构筑，创建一个默认构筑
@@ -441,23 +482,18 @@ class MainApp:
         return True
     
     def load_filters(self):
-        """加载构筑配置"""
-        try:
-            with open(self.filters_path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception as e:
-            messagebox.showerror("错误", f"读取文件失败: {e}")
-            return []
+        """加载构筑配置，旧版文件中字符串形式的词条ID转为int，保存时写为int"""
+        # 深拷贝：编辑中的构筑不能改动存储中缓存的对象
+        filters = copy.deepcopy(config_manager.store.get("filters", []))
+        for build in filters:
+            for key in ("must", "extra", "ban"):
+                if key in build:
+                    build[key] = affix_ids(build[key])
+        return filters
     
     def save_filters(self):
-        """保存构筑配置"""
-        try:
-            # 确保目录存在
-            self.filters_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(self.filters_path, "w", encoding="utf-8") as f:
-                json.dump(self.filters, f, ensure_ascii=False, indent=4)
-        except Exception as e:
-            messagebox.showerror("错误", f"保存文件失败: {e}")
+        """保存构筑配置，原子写入，主程序监视到的总是完整的文件"""
+        config_manager.store.save("filters", self.filters)
 
 
 class EditFilterWindow:
@@ -475,8 +511,6 @@ class EditFilterWindow:
         self.window_height = config_manager.get("window.height")
         self.icon_path = config_manager.get("file_paths.icon")
         self.filter_options = config_manager.get("filter_options")
-        self.entries_path = config_manager.get("file_paths.entries")
-        self.blacklist_path = config_manager.get("file_paths.blacklist")
         
         # 直接使用主窗口
         self.window = parent
@@ -569,7 +603,9 @@ class EditFilterWindow:
         search_entry_frame.pack(side=tk.LEFT, expand=True, fill=tk.X)
         self.search_entry = ttk.Entry(search_entry_frame, textvariable=self.search_var, width=40)
         self.search_entry.pack(side=tk.LEFT, expand=True, fill=tk.X)
-        self.search_entry.bind("<KeyRelease>", self.update_pool)
+        # 输入停顿后再搜索，连续输入时不逐键刷新
+        self._search_job = None
+        self.search_entry.bind("<KeyRelease>", self.schedule_update_pool)
         
         ttk.Button(self.search_frame, text="清空", command=self.clear_search).pack(side=tk.LEFT, padx=5)
         
@@ -577,10 +613,10 @@ class EditFilterWindow:
         self.load_entries()
         
         # 词条池子
-        self.entry_pool = EntryPool(self.left_frame, self.entries, self.blacklist, self.filter_data, self.type_var, self.search_var, self.move_to_build_pool)
+        self.entry_pool = EntryPool(self.left_frame, self.entry_index, self.blacklist_index, self.filter_data, self.type_var, self.search_var, self.move_to_build_pool)
         
         # 构筑池子
-        self.build_pool = BuildPool(self.left_frame, self.entries, self.blacklist, self.filter_data, self.type_var, self.search_var, self.move_to_entry_pool)
+        self.build_pool = BuildPool(self.left_frame, self.entry_index, self.blacklist_index, self.filter_data, self.type_var, self.search_var, self.move_to_entry_pool)
         
         # 右边：详情页
         self.detail_view = DetailView(self.right_frame, self.entries, self.blacklist, self.type_var)
@@ -619,17 +655,19 @@ class EditFilterWindow:
     
     def load_entries(self):
         """加载词条数据"""
-        # 加载entry.json和blacklist.json
+        # 加载entry.json和blacklist.json编译成的词条表，介绍与备注在显示详情时才解码
         try:
-            with open(self.entries_path, "r", encoding="utf-8") as f:
-                self.entries = json.load(f)
-            
-            with open(self.blacklist_path, "r", encoding="utf-8") as f:
-                self.blacklist = json.load(f)
+            table = open_table(config_manager.store.path("entries"), config_manager.store.path("blacklist"))
         except Exception as e:
             messagebox.showerror("错误", f"读取词条文件失败: {e}")
             self.entries = {}
             self.blacklist = {}
+        else:
+            self.entries = table.section("entry")
+            self.blacklist = table.section("blacklist")
+        # 搜索索引只在加载时建立一次
+        self.entry_index = SearchIndex(self.entries)
+        self.blacklist_index = SearchIndex(self.blacklist)
     
     def clear_search(self):
         """清空搜索框"""
@@ -655,8 +693,17 @@ class EditFilterWindow:
         # 同步更新选择框内容
         self.build_selector.update_build_options()
     
+    def schedule_update_pool(self, event=None):
+        """防抖：SEARCH_DEBOUNCE_MS内的连续输入只触发一次更新"""
+        if self._search_job is not None:
+            self.window.after_cancel(self._search_job)
+        self._search_job = self.window.after(SEARCH_DEBOUNCE_MS, self.update_pool)
+    
     def update_pool(self, event=None):
         """更新池子内容"""
+        if self._search_job is not None:
+            self.window.after_cancel(self._search_job)
+            self._search_job = None
         # 更新 EntryPool 和 BuildPool 中的 filter_data 引用
         self.entry_pool.filter_data = self.filter_data
         self.build_pool.filter_data = self.filter_data
@@ -672,7 +719,7 @@ class EditFilterWindow:
         if not selected_item:
             return
         
-        entry_id = selected_item[0]
+        entry_id = affix_id(selected_item[0])
         current_type = self.type_var.get()
         
         # 必选和可选互斥
@@ -696,7 +743,7 @@ class EditFilterWindow:
         current_index = -1
         if items:
             try:
-                current_index = items.index(entry_id)
+                current_index = items.index(selected_item[0])
             except ValueError:
                 pass
         
@@ -716,7 +763,7 @@ class EditFilterWindow:
         if not selected_item:
             return
         
-        entry_id = selected_item[0]
+        entry_id = affix_id(selected_item[0])
         current_type = self.type_var.get()
         
         # 从构筑池子中移除
@@ -728,7 +775,7 @@ class EditFilterWindow:
         current_index = -1
         if items:
             try:
-                current_index = items.index(entry_id)
+                current_index = items.index(selected_item[0])
             except ValueError:
                 pass
         
@@ -748,7 +795,7 @@ class EditFilterWindow:
         selected_item = widget.selection()
         
         if selected_item:
-            entry_id = selected_item[0]
+            entry_id = affix_id(selected_item[0])
             self.detail_view.update(entry_id)
         else:
             self.detail_view.update(None)
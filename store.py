@@ -0,0 +1,92 @@
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# 文件状态 (mtime_ns, size)，文件不存在时为None
+Stamp = Optional[Tuple[int, int]]
+
+
+class JsonStore:
+    """
+    按key管理的JSON配置存储
+    读取结果按文件的(mtime, size)缓存，文件变化后下一次get自动重新读取；读取失败的结果同样缓存，
+    文件不变时不会反复报错。写入先写临时文件再替换，写入中途崩溃不会破坏原文件
+    """
+
+    def __init__(self, paths: Optional[Dict[str, str]] = None,
+                 on_error: Optional[Callable[[str], None]] = None):
+        self.paths: Dict[str, str] = dict(paths or {})
+        self.on_error = on_error
+        self._cache: Dict[str, Tuple[Stamp, Any]] = {}
+        self._lock = threading.Lock()
+
+    def path(self, key: str) -> str:
+        return self.paths[key]
+
+    def set_path(self, key: str, path: str) -> None:
+        with self._lock:
+            self.paths[key] = path
+            self._cache.pop(key, None)
+
+    @staticmethod
+    def _stamp(path: str) -> Stamp:
+        try:
+            stat = os.stat(path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def _report(self, message: str) -> None:
+        if self.on_error:
+            self.on_error(message)
+
+    def load(self, key: str, default: Any = None) -> Any:
+        """忽略缓存重新读取，失败时报告错误并返回default（默认为{}）"""
+        path = self.paths[key]
+        stamp = self._stamp(path)
+        value = {} if default is None else default
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                value = json.load(f)
+        except json.JSONDecodeError:
+            self._report(f"无法解析{path}")
+        except Exception as e:
+            self._report(f"读取{path}时发生错误: {e}")
+        with self._lock:
+            self._cache[key] = (stamp, value)
+        return value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """读取缓存，文件的(mtime, size)变化时重新读取"""
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] == self._stamp(self.paths[key]):
+            return cached[1]
+        return self.load(key, default)
+
+    def cached(self, key: str, default: Any = None) -> Any:
+        """只查缓存，不检查文件是否变化，供重复读取的地方使用；从未读取过时读取一次"""
+        cached = self._cache.get(key)
+        return cached[1] if cached is not None else self.load(key, default)
+
+    def save(self, key: str, data: Any, indent: Optional[int] = 4) -> bool:
+        """原子写入，indent为None时使用紧凑格式"""
+        path = self.paths[key]
+        temp_path = f"{path}.tmp"
+        separators = (',', ':') if indent is None else None
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=indent, separators=separators)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, path)
+        except Exception as e:
+            self._report(f"写入{path}时发生错误: {e}")
+            return False
+        # 不缓存调用方的对象：调用方之后的修改不应出现在缓存里，下次get从磁盘重新读取
+        with self._lock:
+            self._cache.pop(key, None)
+        return True
@@ -1,32 +1,50 @@
 
 import time
+from typing import TYPE_CHECKING
 
-import pydirectinput
-import win32con
-import win32gui
-import win32process
+try:
+    import pydirectinput
+    import win32con
+    import win32gui
+except ImportError:
+    # 非Windows环境下（如离线回放）不可用，按键由外部传入的press替代
+    pydirectinput = None
 
+from affix import AffixId
 from config import Config
 from filter import Filter, Item
-from hook import Hook
+from history import History
 from log import Log
+from metrics import metrics
+from plan import FilterData, Step, TaskConfigError, Until, compile_plan, compile_until, count_steps
 from reader import Reader
+from scheduler import Scheduler, sleep_until
 from total import Total
 
+if TYPE_CHECKING:
+    from hook import Hook
+
 
 class Task:
-    def __init__(self, config,  terminal, hook: Hook,reader:Reader,total:Total):
+    def __init__(self, config,  terminal, hook: 'Hook',reader:Reader,total:Total,history:History=None):
         self.config = config
         self.terminal = terminal
         self.task = None
         self.tasks = None
+        # 编译后的步骤列表
+        self.plan: list[Step] = []
         self.task_count = 0
         self.filter = Filter(self.config.get_filter_data())
         self.hook = hook
-        self.entry = self.config.get_entry_data()
+        self.entry = self.config.get_entry_table()
         self.reader = reader
-        self.last_game_item = None
+        # debug.json在每次开始运行时读取，任务执行中只查字典
+        self.debug = self.config.get_debug_data()
         self.total = total
+        self.history = history
+        # 按键函数，离线回放时替换为记录按键的接收器
+        self.press = pydirectinput.press if pydirectinput else None
+        self.scheduler = Scheduler()
         self.anhen = -1
         self.wangzheng = -1
         self.anhen_lock = -1
@@ -37,74 +55,117 @@ class Task:
         self.expense_wangzheng = 0
         # 匹配次数
         self.match_count = 0
+        # 本次运行累计匹配次数，用于分组的结束条件
+        self.total_match_count = 0
+        # 整个任务的结束条件
+        self.until = None
+        self._step = 0
 
     def load_tasks(self):
-        self.config.load_task_data()
-        self.task = self.config.get_task_data()
-        self.tasks = self.task.get("tasks", [])
-        self.task_count = len(self.tasks)
-        for _task in self.tasks:
-            if _task.get("type") == "group":
-                self.task_count += len(_task.get("tasks", []))
+        task = self.config.load_task_data()
+        if "tasks" not in task:
+            raise TaskConfigError("task.json 无法解析或缺少 tasks")
+        tasks = task["tasks"]
+        times = task.get("times", 1)
+        if isinstance(times, bool) or not isinstance(times, int) or times < 1:
+            raise TaskConfigError(f"times 必须是正整数，当前为 {times!r}")
+        # 编译成功后再替换，配置错误时保留上一次的任务
+        plan = compile_plan(self, tasks)
+        self.until = compile_until(task.get("until"), "task.json")
+        self.plan = plan
+        self.task = task
+        self.tasks = tasks
+        self.times = times
+        self.task_count = count_steps(self.plan)
         return self.tasks
 
+    def reload_filters(self):
+        """重新读取filters.json并编译，成功后整体替换过滤器，正在进行的筛选从下一个遗物起生效"""
+        rules_data = self.config.load_filter_data()
+        if not isinstance(rules_data, list):
+            raise ValueError("filters.json 无法解析或不是规则列表")
+        # 在调用线程中编译，热路径只做一次引用替换
+        self.filter = Filter(rules_data)
+        return len(rules_data)
+
     def execute_all_tasks(self, pid: str, hwnd: int):
         self.terminal.logs(f"[任务]共 {self.task_count} 个任务")
 
-        step = 0
+        self._step = 0
+        self.total_match_count = 0
+        self.debug = self.config.cached("debug")
+        # JSON修改后旧表会被关闭，每次运行开始时重新取得
+        self.entry = self.config.get_entry_table()
         self._switch_window_to_foreground(hwnd)
+        # 丢弃上一次运行残留的遗物事件
+        self.hook.clear()
+
+        self.scheduler.start()
+        # plan传None时每轮读取self.plan，热重载的任务从下一轮起生效
+        self._run_group(self.times, None, self.until)
+        self.total.flush(force=True)
+        if self.history:
+            self.history.flush()
+        self.terminal.logs(f"[任务]执行完成，共执行 {self._step} 个任务")
+
+    def _execute_step(self, step: Step):
+        self._step += 1
+        self.terminal.logs(
+        f"{self._step}/{self.task_count} - {step.tips}")
+        self.scheduler.wait(step.delay, step.wake)
+        step.handler()
+        # 分组的子步骤已各自把执行耗时计入计划时刻，再计一次会把最后一个子步骤的耗时重复累加
+        if step.type != "group":
+            self.scheduler.done()
+
+    def _run_group(self, times: int, plan: list[Step] | None, until: Until = None):
+        """重复执行一组步骤，每轮结束后检查结束条件；plan为None时执行当前的self.plan"""
+        start_match_count = self.total_match_count
+        for i in range(times):
+            for step in self.plan if plan is None else plan:
+                self._execute_step(step)
+            if until and self._until_met(until, start_match_count):
+                self.terminal.logs(f"[任务]已满足结束条件，第 {i + 1}/{times} 轮后结束")
+                return
+
+    def _until_met(self, until: Until, start_match_count: int) -> bool:
+        if until.matches is not None and self.total_match_count - start_match_count >= until.matches:
+            return True
+        if until.anhen_below is not None:
+            anhen = self.reader.snapshot().anhen
+            # 读取失败(-1)时不结束
+            if 0 <= anhen < until.anhen_below:
+                return True
+        return False
+
+    def _run_filter(self, times: int, interval: float, data: FilterData):
+        self.match_count = 0
+        self._task_filter(times, interval, data)
+        self.total.flush()
 
-        self.times = self.task.get("times", 1)
-        for _ in range(self.times):
-            for task in self.tasks:
-                step += 1
-                self.terminal.logs(
-                f"{step}/{self.task_count} - {task.get('tips', '无提示')}")
-                self._execute_task(task)
-        self.terminal.logs(f"[任务]执行完成，共执行 {step} 个任务")
-
-    def _execute_task(self, task):
-        delay = task.get('delay', 0)
-        if delay > 0:
-            time.sleep(delay)
-
-        times = max(1, task.get('times', 1))
-        tips = task.get('tips', '')
-
-        if task.get("type") == "key":
-            self._task_key(times, task.get('key', '').lower())
-        elif task.get("type") == "filter":
-            self.match_count = 0
-            data = task.get('data', {})
-            self._task_filter(times, delay, data)
-            self.config.save_total_data(self.total.get_all())
-        elif task.get("type") == "get":
-            self._task_get()
-        elif task.get("type") == "set":
-            self._task_set()
-        
     def _task_get(self):
+        snapshot = self.reader.snapshot()
         if self.anhen == -1:
-            self.anhen = self.reader.get_anhen()
+            self.anhen = snapshot.anhen
             self.anhen_lock = self.anhen
             self.terminal.logs(f"[任务]获取到当前暗痕值: {self.anhen}")
-            self.quantity = self.reader.get_quantity()
+            self.quantity = snapshot.quantity
         else:
-            anhen = self.reader.get_anhen()
+            anhen = snapshot.anhen
             self.expense_anhen =  self.anhen - anhen
             self.anhen = -1
 
         if self.wangzheng == -1:
-            self.wangzheng = self.reader.get_wangzheng()
+            self.wangzheng = snapshot.wangzheng
             self.wangzheng_lock = self.wangzheng
             self.terminal.logs(f"[任务]获取到当前王证值: {self.wangzheng}")
         else:
-            wangzheng = self.reader.get_wangzheng()
+            wangzheng = snapshot.wangzheng
             self.expense_wangzheng = self.wangzheng - wangzheng
             self.wangzheng = -1
 
     def _task_set(self):
-        debug = self.config.get_debug_data()
+        debug = self.debug
         anhen_price = -1
         wangzheng_price = -1
 
@@ -131,25 +192,32 @@ class Task:
 
 
     def _task_key(self, times: int = 1, key: str = "f", interval: float = 0):
+        # 按固定节拍计算每次按键的截止时刻，睡眠误差不会累积
+        deadline = time.perf_counter()
         for i in range(times):
-            pydirectinput.press(key)
+            key_start = metrics.start()
+            self.press(key)
+            metrics.stop("task.key", key_start)
             if i < times - 1 and interval > 0:
-                time.sleep(interval)
+                deadline += interval
+                sleep_until(deadline)
 
-    def _task_filter(self, times: int = 1,  interval: float = 0, data: dict = {}):
-        self.match = self.config.get_filter_data()
+    def _task_filter(self, times: int = 1,  interval: float = 0, data: FilterData = None):
         is_matched = False
+        timeout = data.timeout
         for i in range(times):
-            gameItems = self.hook.get_data()
+            wait_start = metrics.start()
+            gameItems = self.hook.get_data(block=True, timeout=timeout)
+            metrics.stop("task.wait", wait_start)
             if not gameItems:
-                continue
-
-            if self.last_game_item == gameItems:
-                continue
-            self.last_game_item = gameItems
+                self.terminal.logs(f"[任务]等待遗物超时({timeout}秒)，结束筛选", log_type="error")
+                break
 
+            match_start = metrics.start()
             item =  Item.from_dict(gameItems)
-            is_matched,score = self.filter.match(item)
+            is_matched,score,rule_index = self.filter.match_rule(item)
+            metrics.stop("filter.match", match_start)
+            log_start = metrics.start()
             nums = "-"*5 +str(i+1) + "/" + str(times) + "-" * 5
             self.terminal.logs(nums)
             print(nums)
@@ -157,41 +225,50 @@ class Task:
             debuff_len = len(gameItems["debuff"])
             for i in range(3):
                 if i < buff_len:
-                    buff_id_str = str(gameItems["buff"][i])
-                    buff = self.get_tag_name(buff_id_str)
-                    self.total.add(buff_id_str)
+                    buff_id = gameItems["buff"][i]
+                    buff = self.get_tag_name(buff_id)
+                    self.total.add(buff_id)
                 else:
                     buff = "无"
                 self.terminal.logs("词条"+ str(i+1)+":"+buff)
                 print("词条"+ str(i+1)+":"+buff)
                 if i < debuff_len:
-                    debuff_id_str = str(gameItems["debuff"][i])
-                    debuff = self.get_tag_name(debuff_id_str)
-                    self.total.add(debuff_id_str)
+                    debuff_id = gameItems["debuff"][i]
+                    debuff = self.get_tag_name(debuff_id)
+                    self.total.add(debuff_id)
                 else:
                     debuff = "无"
                 self.terminal.logs("词条"+ str(i+1)+":"+debuff)
                 print("词条"+ str(i+1)+":"+debuff)
             self.terminal.logs("匹配得分:"+str(score))
             print("匹配得分:"+str(score))
+            latency = self.hook.latency_ns(gameItems)
+            if latency >= 0:
+                self.terminal.logs(f"决策延迟:{latency / 1e6:.2f}ms")
+                print(f"决策延迟:{latency / 1e6:.2f}ms")
             
             if is_matched:
                 self.match_count += 1
+                self.total_match_count += 1
                 self.terminal.logs("匹配成功")
                 print("匹配成功")
+            metrics.stop("task.filter_log", log_start)
+            result_start = metrics.start()
             self._task_filter_result(is_matched,data)
+            metrics.stop("task.filter_result", result_start)
+            # 从Hook收到事件到按键完成的总耗时
+            metrics.stop("relic.total", gameItems.get("recv_ns", 0) if metrics.enabled else 0)
+            # 按键完成后再记录，不占用决策延迟
+            if self.history:
+                self.history.append(gameItems.get("seq", 0), gameItems["buff"], gameItems["debuff"], score, rule_index)
     
-    def _task_filter_result(self,result:bool=False,data : dict={}):
-        actions = {}
-        if result:
-            actions = data.get("success", {})
-        else:
-            actions = data.get("failure", {})
-        for key in actions["key"]:
-            self._task_key(1,key.lower(),actions.get("interval", 0))
+    def _task_filter_result(self,result:bool=False,data : FilterData=None):
+        actions = data.success if result else data.failure
+        for key in actions.keys:
+            self._task_key(1,key,actions.interval)
     
-    def get_tag_name(self,tag_id: str | int) -> str:
-        return self.entry.get(tag_id, {}).get("name", "")
+    def get_tag_name(self,tag_id: AffixId) -> str:
+        return self.entry.name(tag_id)
 
     def _switch_window_to_foreground(self, hwnd):
         try:
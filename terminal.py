@@ -1,17 +1,35 @@
 import tkinter as tk
 import json
+import logging
+from collections import deque
+from logging.handlers import RotatingFileHandler
 import log
 
 
 class Terminal:
-    def __init__(self, log):
+    def __init__(self, log, root=None, text=None):
+        """root与text可传入替身，不创建Tk窗口（用于基准测试）"""
         with open('config/terminal.json', 'r', encoding='utf-8') as f:
             self.terminal_config = json.load(f)
-        self.root = tk.Tk()
+        self.root = root if root is not None else tk.Tk()
         self.log = log
-        self.lines = []
-        self._setup_window()
-        self._setup_widgets()
+        # 当前显示的行，超过上限时从头部批量裁剪
+        self.lines = deque()
+        scrollback = self.terminal_config.get('scrollback', {})
+        self.max_lines = scrollback.get('max_lines', 5000)
+        self.trim_lines = max(1, scrollback.get('trim', 500))
+        self._spill = self._setup_spill(scrollback)
+        # 待显示的日志，生产者线程只追加，由Tk主循环定时批量取出
+        self._pending = deque()
+        self.flush_ms = self.terminal_config.get('flush_ms', 50)
+        self.flush_batch = self.terminal_config.get('flush_batch', 500)
+        if root is None:
+            self._setup_window()
+        if text is None:
+            self._setup_widgets()
+        else:
+            self.text = text
+        self.root.after(self.flush_ms, self._drain)
 
     def _setup_window(self):
         self.root.title('Terminal')
@@ -38,16 +56,63 @@ class Terminal:
         self.text.config(state=tk.DISABLED)
         self.log.prints('终端启动成功')
 
+    def _setup_spill(self, scrollback):
+        """被裁剪的行可选写入滚动日志文件"""
+        path = scrollback.get('spill', '')
+        if not path:
+            return None
+        spill = logging.getLogger('terminal.spill')
+        spill.propagate = False
+        spill.setLevel(logging.INFO)
+        handler = RotatingFileHandler(
+            path, maxBytes=scrollback.get('spill_max_bytes', 1048576),
+            backupCount=scrollback.get('spill_backups', 3), encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        spill.addHandler(handler)
+        return spill
+
+    def _trim(self):
+        """超过上限+裁剪量时一次删除最旧的行，回到上限"""
+        if not self.max_lines or len(self.lines) < self.max_lines + self.trim_lines:
+            return
+        count = len(self.lines) - self.max_lines
+        evicted = [self.lines.popleft() for _ in range(count)]
+        self.text.delete('1.0', f'{count + 1}.0')
+        if self._spill:
+            self._spill.info(''.join(evicted).rstrip('\n'))
+
     def logs(self, message, log_type=None):
-        self.text.config(state=tk.NORMAL)
-        self.text.insert(tk.END, f'{message}\n')
-        self.text.see(tk.END)
-        self.text.config(state=tk.DISABLED)
-        if log_type is not None:
-            self.log.prints(message, log_type)
+        """非阻塞写入日志，可在任意线程调用"""
+        self._pending.append((message, log_type))
+
+    def _drain(self):
+        """在Tk主循环中批量取出日志，合并为一次插入和一次滚动"""
+        try:
+            lines = []
+            while self._pending and len(lines) < self.flush_batch:
+                message, log_type = self._pending.popleft()
+                # 按换行拆分，与Text控件的行数一致，裁剪时才能删到正确的位置
+                lines.extend(f'{line}\n' for line in str(message).split('\n'))
+                if log_type is not None:
+                    self.log.prints(message, log_type)
+            if lines:
+                self.text.config(state=tk.NORMAL)
+                self.text.insert(tk.END, ''.join(lines))
+                self.lines.extend(lines)
+                self._trim()
+                self.text.see(tk.END)
+                self.text.config(state=tk.DISABLED)
+        finally:
+            # 积压未清空时尽快再次调度
+            self.root.after(1 if self._pending else self.flush_ms, self._drain)
 
     def run(self):
         self.root.mainloop()
 
     def destroy(self):
+        # 窗口销毁前把尚未显示的带类型日志输出到控制台
+        while self._pending:
+            message, log_type = self._pending.popleft()
+            if log_type is not None:
+                self.log.prints(message, log_type)
         self.root.destroy()
@@ -0,0 +1,89 @@
+import random
+
+import pytest
+
+from filter import Filter, FilterRule, Item
+
+TAGS = list(range(1000, 1030))
+SCORES = [0, 1, 2, 3, 10, 11, 12, 20, 21, 30, -1, -5]
+
+
+def reference_match(filter: Filter, item: Item):
+    """原先逐条规则调用_calculate_score的实现，作为编译索引的对照"""
+    score = 0
+    for index, rule in enumerate(filter._rules):
+        score = filter._calculate_score(item, rule)
+        if score == -1:
+            continue
+        if rule.score == 0:
+            if score > 0:
+                return True, score, index
+            continue
+        if score >= rule.score:
+            return True, score, index
+    return False, score, -1
+
+
+def random_rules(rng: random.Random):
+    return [{
+        "name": f"rule{i}",
+        # 新旧两种ID形式都要能加载
+        "must": [str(tag) if rng.random() < 0.5 else tag for tag in rng.sample(TAGS, rng.randint(0, 6))],
+        "extra": rng.sample(TAGS, rng.randint(0, 6)),
+        "ban": rng.sample(TAGS, rng.randint(0, 3)),
+        "score": rng.choice(SCORES),
+    } for i in range(rng.randint(0, 8))]
+
+
+def random_items(rng: random.Random, count: int):
+    return [Item(buff=frozenset(rng.sample(TAGS, rng.randint(0, 3))),
+                 debuff=frozenset(rng.sample(TAGS, rng.randint(0, 3))))
+            for _ in range(count)]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_match_rule_agrees_with_reference(seed):
+    rng = random.Random(seed)
+    for _ in range(50):
+        flt = Filter(random_rules(rng))
+        for item in random_items(rng, 50):
+            expected = reference_match(flt, item)
+            assert flt.match_rule(item) == expected
+            assert flt.match(item) == expected[:2]
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_match_many_agrees_with_reference(seed):
+    rng = random.Random(seed)
+    for _ in range(20):
+        flt = Filter(random_rules(rng))
+        items = random_items(rng, 200)
+        # 小分块以覆盖跨块的情况
+        matched, scores, rule_index = flt.match_many(items, tag_space=TAGS, chunk_size=64)
+        for i, item in enumerate(items):
+            expected = reference_match(flt, item)
+            assert (bool(matched[i]), int(scores[i]), int(rule_index[i])) == expected
+
+
+def test_zero_and_negative_score_rules():
+    flt = Filter([
+        {"name": "banned", "must": [1000], "ban": [1001], "score": 10},
+        {"name": "zero", "extra": [1002], "score": 0},
+        {"name": "negative", "score": -1},
+    ])
+    # 被禁用的规则跳过；score为0时至少命中一个词条
+    assert flt.match_rule(Item(frozenset({1000, 1002}), frozenset({1001}))) == (True, 1, 1)
+    # 负阈值的规则无需命中任何词条
+    assert flt.match_rule(Item(frozenset(), frozenset())) == (True, 0, 2)
+
+
+def test_empty_rules():
+    flt = Filter([])
+    assert flt.match(Item(frozenset({1000}))) == (False, 0)
+    matched, scores, rule_index = flt.match_many([Item(frozenset({1000}))])
+    assert not matched[0] and scores[0] == 0 and rule_index[0] == -1
+
+
+def test_rule_from_dict_accepts_string_ids():
+    rule = FilterRule.from_dict({"name": "r", "must": ["1000"], "extra": [1001], "score": "10"})
+    assert rule.must == {1000} and rule.extra == {1001} and rule.score == 10
@@ -0,0 +1,70 @@
+import os
+
+import numpy as np
+
+from history import CHUNK_HEADER, History, HistoryReader
+
+
+class StubTerminal:
+    def __init__(self):
+        self.errors = []
+
+    def logs(self, message, log_type=None):
+        if log_type == "error":
+            self.errors.append(message)
+
+
+def write_rows(path, start, count, chunk_rows=4):
+    history = History(str(path), chunk_rows=chunk_rows, session=1)
+    for seq in range(start, start + count):
+        history.append(seq, [seq, seq + 1], [seq + 2], seq % 7, -1, ts=seq)
+    history.flush()
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / "relics.bin"
+    write_rows(path, 0, 10)
+    reader = HistoryReader(str(path))
+    assert len(reader) == 10
+    assert len(reader.chunks()) == 3
+    assert reader.column("seq").tolist() == list(range(10))
+    assert reader.buffs()[3].tolist() == [3, 4, -1]
+    assert reader.debuffs()[3].tolist() == [5, -1, -1]
+
+
+def test_torn_chunk_header_is_not_decoded(tmp_path):
+    path = tmp_path / "relics.bin"
+    write_rows(path, 0, 4)
+    size = os.path.getsize(path)
+    # 崩溃时只写了块头和部分数据，块头声明的长度仍在文件范围内
+    with open(path, "ab") as f:
+        f.write(CHUNK_HEADER.pack(b"RLCH", 1, 11))
+        f.write(b"\xff" * 200)
+    reader = HistoryReader(str(path))
+    assert reader.column("seq").tolist() == [0, 1, 2, 3]
+    del reader
+
+    # 重新打开时截掉残块，之后写入的块可以正常读取
+    write_rows(path, 4, 4)
+    reader = HistoryReader(str(path))
+    assert reader.column("seq").tolist() == list(range(8))
+    assert os.path.getsize(path) == 2 * size
+
+
+def test_flush_error_is_logged(tmp_path):
+    terminal = StubTerminal()
+    # 目标路径是目录，写入失败
+    history = History(str(tmp_path), session=1, terminal=terminal)
+    history.append(1, [1], [2], 0)
+    history.flush()
+    assert len(terminal.errors) == 1
+    history.flush()
+    assert len(terminal.errors) == 1
+
+
+def test_empty_file(tmp_path):
+    path = tmp_path / "relics.bin"
+    path.write_bytes(b"")
+    reader = HistoryReader(str(path))
+    assert len(reader) == 0
+    assert reader.column("score").dtype == np.dtype("<i4")
@@ -0,0 +1,118 @@
+import importlib
+import sys
+import threading
+import time
+import types
+
+import pytest
+
+from script_cache import ScriptCache
+
+
+class StubTerminal:
+    def logs(self, message, log_type=None):
+        pass
+
+
+class FakeScript:
+    def __init__(self):
+        self.handlers = {}
+        self.exports = types.SimpleNamespace(init=lambda options: {}, ping=lambda: True)
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    def load(self):
+        pass
+
+    def unload(self):
+        pass
+
+
+class FakeSession:
+    """代替frida会话，保存detached回调以便模拟游戏退出"""
+
+    def __init__(self):
+        self.handlers = {}
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    def detach(self):
+        pass
+
+    def compile_script(self, source, name=None):
+        return source.encode("utf-8")
+
+    def create_script_from_bytes(self, data, name=None):
+        return FakeScript()
+
+    def create_script(self, source, name=None):
+        return FakeScript()
+
+
+class FakeFrida(types.ModuleType):
+    """代替frida模块，failures次数内attach失败，之后返回新会话"""
+
+    __version__ = "test"
+
+    def __init__(self):
+        super().__init__("frida")
+        self.calls = []
+        self.sessions = []
+        self.failures = 0
+        self.attached = threading.Event()
+
+    def attach(self, name):
+        self.calls.append(time.perf_counter())
+        if self.failures > 0:
+            self.failures -= 1
+            raise RuntimeError("process not found")
+        session = FakeSession()
+        self.sessions.append(session)
+        self.attached.set()
+        return session
+
+
+@pytest.fixture
+def frida(monkeypatch):
+    fake = FakeFrida()
+    monkeypatch.setitem(sys.modules, "frida", fake)
+    monkeypatch.delitem(sys.modules, "hook", raising=False)
+    return fake
+
+
+def make_hook(frida, tmp_path, **options):
+    hook_module = importlib.import_module("hook")
+    hook = hook_module.Hook(StubTerminal(), options)
+    hook._script_cache = ScriptCache(
+        hook._script_cache.script_path, hook.process_name, cache_dir=str(tmp_path / "script"))
+    hook._aob_cache_path = str(tmp_path / "aob.json")
+    return hook
+
+
+def test_reconnect_backs_off_after_detach(frida, tmp_path):
+    hook = make_hook(frida, tmp_path, ping_interval=60, backoff_base=0.05, backoff_max=1)
+    hook.start()
+    try:
+        assert frida.attached.wait(2)
+        frida.attached.clear()
+        # 游戏退出：会话断开，之后3次attach失败，第4次重新连上
+        frida.failures = 3
+        frida.sessions[0].handlers["detached"]()
+        assert frida.attached.wait(5)
+        assert len(frida.sessions) == 2
+        assert len(frida.calls) == 5
+        gaps = [b - a for a, b in zip(frida.calls[1:], frida.calls[2:])]
+        # 每次失败后的等待至少为退避间隔的一半
+        for attempt, gap in enumerate(gaps):
+            assert gap >= 0.05 * 2 ** attempt / 2 * 0.9
+        assert hook.session is frida.sessions[1]
+    finally:
+        hook.stop()
+
+
+def test_backoff_is_bounded(frida, tmp_path):
+    hook = make_hook(frida, tmp_path, backoff_base=0.5, backoff_max=30)
+    for attempt in (0, 10, 1024, 100000):
+        assert 0 <= hook._backoff(attempt) <= 30
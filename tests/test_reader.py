@@ -0,0 +1,61 @@
+import struct
+
+from memory import FakeProcess
+from reader import Reader, Snapshot
+
+NAME = "nightreign.exe"
+
+
+def make_reader(**values):
+    return Reader(exe_module_name=NAME, backend=FakeProcess.nightreign(**values))
+
+
+def test_snapshot_matches_single_reads():
+    reader = make_reader(anhen=123456789012, wangzheng=42, quantity=7)
+    snapshot = reader.snapshot()
+    assert snapshot == Snapshot(123456789012, 42, 7)
+    assert snapshot == Snapshot(reader.get_anhen(), reader.get_wangzheng(), reader.get_quantity())
+
+
+def test_set_values_round_trip():
+    reader = make_reader(anhen=1000, wangzheng=50, quantity=3)
+    reader.snapshot()
+    assert reader.set_anhen(2 ** 40)
+    assert reader.set_wangzheng(99)
+    assert reader.snapshot() == Snapshot(2 ** 40, 99, 3)
+    # 负数不写入
+    assert not reader.set_anhen(-1)
+    assert reader.get_anhen() == 2 ** 40
+
+
+def test_set_without_prior_read_resolves_pointer():
+    reader = make_reader(anhen=1, wangzheng=2, quantity=3)
+    assert reader.set_wangzheng(5)
+    assert reader.get_wangzheng() == 5
+
+
+def test_null_base_pointer_returns_empty_snapshot():
+    process = FakeProcess.nightreign(anhen=1, wangzheng=2, quantity=3)
+    process.write(0x140000000 + Reader.MODULE_BASE_OFFSET, struct.pack("<q", 0))
+    reader = Reader(exe_module_name=NAME, backend=process)
+    assert reader.snapshot() == Snapshot()
+
+
+def test_missing_module_returns_empty_snapshot():
+    reader = Reader(exe_module_name="other.exe", backend=FakeProcess.nightreign())
+    assert reader.snapshot() == Snapshot()
+
+
+def test_stale_module_base_is_resolved_again():
+    reader = make_reader(anhen=10, wangzheng=20, quantity=30)
+    assert reader.snapshot() == Snapshot(10, 20, 30)
+    old_base = reader._cached_exe_base
+    # 游戏重启后模块加载到新的基址，缓存的基址已不可读
+    reader.backend = FakeProcess.nightreign(anhen=11, wangzheng=21, quantity=31,
+                                            module_base=0x7FF600000000)
+    assert reader.snapshot() == Snapshot(11, 21, 31)
+    assert reader._cached_exe_base == 0x7FF600000000 != old_base
+
+
+def test_no_backend():
+    assert Reader().snapshot() == Snapshot()
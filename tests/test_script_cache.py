@@ -0,0 +1,86 @@
+import os
+
+import pytest
+
+from script_cache import ScriptCache
+
+
+class FakeSession:
+    """代替frida会话，记录编译与创建脚本的调用"""
+
+    def __init__(self, fail_from_bytes: bool = False):
+        self.fail_from_bytes = fail_from_bytes
+        self.compiled = 0
+        self.from_bytes = []
+        self.from_source = []
+
+    def compile_script(self, source, name=None):
+        self.compiled += 1
+        return ("bytecode:" + source).encode("utf-8")
+
+    def create_script_from_bytes(self, data, name=None):
+        if self.fail_from_bytes:
+            raise RuntimeError("invalid bytecode")
+        self.from_bytes.append(data)
+        return ("bytes", data)
+
+    def create_script(self, source, name=None):
+        self.from_source.append(source)
+        return ("source", source)
+
+
+@pytest.fixture
+def script(tmp_path):
+    path = tmp_path / "hook.js"
+    path.write_text("attach('%s');", encoding="utf-8")
+    return path
+
+
+def make_cache(script, tmp_path, salt=""):
+    return ScriptCache(str(script), "nightreign.exe", cache_dir=str(tmp_path / "cache"), salt=salt)
+
+
+def test_memory_hit_on_second_connect(script, tmp_path):
+    cache = make_cache(script, tmp_path)
+    session = FakeSession()
+    first = cache.create_script(session)
+    second = cache.create_script(session)
+    assert session.compiled == 1
+    assert first == second == ("bytes", b"bytecode:attach('nightreign.exe');")
+    assert os.path.exists(os.path.join(tmp_path, "cache", f"{cache.key()}.qjs"))
+
+
+def test_disk_hit_from_new_instance(script, tmp_path):
+    make_cache(script, tmp_path).create_script(FakeSession())
+    session = FakeSession()
+    result = make_cache(script, tmp_path).create_script(session)
+    assert session.compiled == 0
+    assert result[0] == "bytes"
+
+
+def test_key_changes_with_file_and_salt(script, tmp_path):
+    cache = make_cache(script, tmp_path)
+    key = cache.key()
+    # 内容与长度都变化
+    script.write_text("attach('%s'); send(1);", encoding="utf-8")
+    assert cache.key() != key
+    key = cache.key()
+    # 长度不变，只有mtime变化
+    script.write_text("attach('%s'); send(2);", encoding="utf-8")
+    stat = os.stat(script)
+    os.utime(script, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert cache.key() != key
+    assert make_cache(script, tmp_path, salt="frida-17").key() != cache.key()
+
+
+def test_bad_bytecode_is_dropped_and_falls_back_to_source(script, tmp_path):
+    cache = make_cache(script, tmp_path)
+    cache.create_script(FakeSession())
+    cache_file = os.path.join(tmp_path, "cache", f"{cache.key()}.qjs")
+    assert os.path.exists(cache_file)
+
+    session = FakeSession(fail_from_bytes=True)
+    result = cache.create_script(session)
+    assert result == ("source", "attach('nightreign.exe');")
+    assert not os.path.exists(cache_file)
+    assert cache.key() not in cache._bytecode
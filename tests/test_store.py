@@ -0,0 +1,58 @@
+import os
+
+from store import JsonStore
+
+
+def make_store(tmp_path, errors=None):
+    path = str(tmp_path / "data.json")
+    return JsonStore({"data": path}, on_error=(errors.append if errors is not None else None)), path
+
+
+def test_empty_file_is_cached(tmp_path):
+    store, path = make_store(tmp_path)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[]")
+    first = store.get("data")
+    assert first == [] and store.get("data") is first
+
+
+def test_change_on_disk_is_picked_up(tmp_path):
+    store, path = make_store(tmp_path)
+    store.save("data", {"a": 1})
+    assert store.get("data") == {"a": 1}
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"a": 22}')
+    assert store.get("data") == {"a": 22}
+
+
+def test_saved_object_is_not_aliased_by_cache(tmp_path):
+    store, _ = make_store(tmp_path)
+    data = {"a": 1}
+    store.save("data", data)
+    data["a"] = 2
+    assert store.get("data") == {"a": 1}
+
+
+def test_broken_file_is_reported_once(tmp_path):
+    errors = []
+    store, path = make_store(tmp_path, errors)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{")
+    assert store.get("data") == {}
+    assert store.get("data", []) == {}
+    assert len(errors) == 1
+
+
+def test_cached_does_not_touch_disk_after_first_read(tmp_path):
+    store, path = make_store(tmp_path)
+    store.save("data", [1])
+    assert store.cached("data") == [1]
+    os.remove(path)
+    assert store.cached("data") == [1]
+    assert store.load("data") == {}
+
+
+def test_save_is_atomic(tmp_path):
+    store, path = make_store(tmp_path)
+    assert store.save("data", [1, 2])
+    assert not os.path.exists(f"{path}.tmp")
@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+from terminal import Terminal
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class StubLog:
+    def prints(self, message, log_type=None):
+        pass
+
+
+class StubRoot:
+    def after(self, ms, func=None):
+        return None
+
+
+class LineText:
+    """按行保存内容的Text替身，delete('1.0', 'N.0')与Tk一样删除前N-1行"""
+
+    def __init__(self):
+        self.rows = []
+
+    def config(self, **kwargs):
+        pass
+
+    def insert(self, index, text):
+        self.rows.extend(text.splitlines())
+
+    def delete(self, start, end):
+        del self.rows[:int(end.split('.')[0]) - 1]
+
+    def see(self, index):
+        pass
+
+
+@pytest.fixture
+def terminal(monkeypatch):
+    monkeypatch.chdir(ROOT)
+    terminal = Terminal(StubLog(), root=StubRoot(), text=LineText())
+    terminal.max_lines = 10
+    terminal.trim_lines = 5
+    return terminal
+
+
+def drain(terminal):
+    while terminal._pending:
+        terminal._drain()
+
+
+def test_multiline_messages_keep_widget_bounded(terminal):
+    for i in range(100):
+        terminal.logs(f"加载任务失败: {i}\n第二行\n第三行")
+        drain(terminal)
+        assert len(terminal.text.rows) == len(terminal.lines)
+        assert len(terminal.lines) < terminal.max_lines + terminal.trim_lines
+    assert terminal.text.rows[-3:] == ["加载任务失败: 99", "第二行", "第三行"]
+
+
+def test_single_line_messages(terminal):
+    for i in range(30):
+        terminal.logs(str(i))
+    drain(terminal)
+    assert terminal.text.rows == [str(i) for i in range(20, 30)]
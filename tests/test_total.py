@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+from config import Config
+from total import Total
+
+
+class StubTerminal:
+    def __init__(self):
+        self.errors = []
+
+    def logs(self, message, log_type=None):
+        if log_type == "error":
+            self.errors.append(message)
+
+
+@pytest.fixture
+def config(tmp_path):
+    config = Config(StubTerminal())
+    config.total_path = str(tmp_path / "total.json")
+    with open(config.total_path, "w", encoding="utf-8") as f:
+        json.dump({"7000000": 5}, f)
+    return config
+
+
+def tear(total: Total):
+    """模拟追加写入时崩溃：留下没有换行结尾的残行"""
+    with open(total.delta_path, "a", encoding="utf-8") as f:
+        f.write('{"7000000":')
+
+
+def test_delta_log_survives_restart(config):
+    total = Total(config)
+    total.add(7000000)
+    total._last_flush = 0
+    total.flush()
+    assert Total(config).get(7000000) == 6
+
+
+def test_torn_line_does_not_swallow_next_delta(config):
+    total = Total(config)
+    total.add(7000000)
+    total._last_flush = 0
+    total.flush()
+    tear(total)
+
+    total = Total(config)
+    assert total.get(7000000) == 6
+    total.add(7000000)
+    total._last_flush = 0
+    total.flush()
+    assert Total(config).get(7000000) == 7
+
+
+def test_torn_line_when_compaction_fails(config, monkeypatch):
+    total = Total(config)
+    total.add(7000000)
+    total._last_flush = 0
+    total.flush()
+    tear(total)
+
+    monkeypatch.setattr(config, "save_total_data", lambda data: False)
+    total = Total(config)
+    total.add(7000000)
+    total._last_flush = 0
+    total.flush()
+    monkeypatch.undo()
+    assert Total(config).get(7000000) == 7
+
+
+def test_string_keys_are_loaded_as_ints(config):
+    total = Total(config)
+    assert total.get_all() == {7000000: 5}
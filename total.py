@@ -1,19 +1,118 @@
+import hashlib
+import json
+import os
+import time
+
+from affix import AffixId, affix_counts
 from config import Config
 
 
 class Total:
-    def __init__(self, config):
+    """
+    词条出现次数统计
+    新增计数先记为脏数据，按防抖间隔以增量日志追加写入；日志过长或退出时合并回total.json
+    增量日志首行记录其所基于的total.json哈希，合并后旧日志因哈希不匹配而不会被重复回放
+    """
+
+    def __init__(self, config, interval: float = 5.0, compact_after: int = 200):
         self.config = config
+        self.interval = interval
+        self.compact_after = compact_after
+        self.delta_path = f"{self.config.total_path}.log"
         self.total = self.config.get_total_data()
         if not isinstance(self.total, dict):
             self.total = {}
+        self._dirty = {}
+        self._last_flush = time.monotonic()
+        self._delta_lines = 0
+        self._base = self._snapshot_token()
+        # 日志中有写了一半的行（无换行结尾），继续追加会把下一条增量接在它后面
+        self._torn = False
+        if not self._replay():
+            self._reset_delta()
+        elif self._torn:
+            self.compact()
+
+    def _snapshot_token(self) -> str:
+        try:
+            with open(self.config.total_path, 'rb') as f:
+                return hashlib.sha1(f.read()).hexdigest()
+        except OSError:
+            return ""
+
+    def _replay(self) -> bool:
+        """回放基于当前total.json的增量日志，日志缺失或已过期时返回False"""
+        try:
+            with open(self.delta_path, 'r', encoding='utf-8') as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return False
+        try:
+            header = json.loads(lines[0]) if lines else {}
+        except json.JSONDecodeError:
+            return False
+        if header.get("base") != self._base:
+            return False
+        for line in lines[1:]:
+            try:
+                delta = json.loads(line)
+            except json.JSONDecodeError:
+                # 崩溃时写了一半的行
+                self._torn = True
+                continue
+            for key, count in affix_counts(delta).items():
+                self.total[key] = self.total.get(key, 0) + count
+            self._delta_lines += 1
+        return True
+
+    def _reset_delta(self) -> None:
+        """以当前total.json为基准重建空的增量日志"""
+        temp_path = f"{self.delta_path}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps({"base": self._base}) + "\n")
+            os.replace(temp_path, self.delta_path)
+        except OSError as e:
+            self.config.terminal.logs(f"写入{self.delta_path}时发生错误: {e}", log_type="error")
+        self._delta_lines = 0
+
+    def add(self, item_id: AffixId):
+        self.total[item_id] = self.total.get(item_id, 0) + 1
+        self._dirty[item_id] = self._dirty.get(item_id, 0) + 1
     
-    def add(self, item_id):
-        key = str(item_id)
-        self.total[key] = self.total.get(key, 0) + 1
-    
-    def get(self, item_id):
-        return self.total.get(str(item_id), 0)
+    def get(self, item_id: AffixId):
+        return self.total.get(item_id, 0)
     
     def get_all(self):
-        return self.total
\ No newline at end of file
+        return self.total
+
+    def flush(self, force: bool = False) -> None:
+        """追加写入脏数据；未到防抖间隔时跳过，force时立即写入并合并"""
+        if not force and time.monotonic() - self._last_flush < self.interval:
+            return
+        self._last_flush = time.monotonic()
+        if self._dirty:
+            try:
+                with open(self.delta_path, 'a', encoding='utf-8') as f:
+                    # 合并失败时仍有残行，先换行再写，避免新增量与残行粘连
+                    prefix = "\n" if self._torn else ""
+                    f.write(prefix + json.dumps(self._dirty, separators=(',', ':')) + "\n")
+                self._torn = False
+                self._dirty = {}
+                self._delta_lines += 1
+            except OSError as e:
+                self.config.terminal.logs(f"写入{self.delta_path}时发生错误: {e}", log_type="error")
+                return
+        if force or self._delta_lines >= self.compact_after:
+            self.compact()
+
+    def compact(self) -> None:
+        """把全部计数写回total.json，并以新快照为基准重建增量日志"""
+        if not self._delta_lines and not self._dirty and not self._torn:
+            return
+        if not self.config.save_total_data(self.total):
+            return
+        self._dirty = {}
+        self._torn = False
+        self._base = self._snapshot_token()
+        self._reset_delta()
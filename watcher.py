@@ -0,0 +1,135 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+# inotify 事件掩码
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_CLOEXEC = 0o2000000
+INOTIFY_EVENT = struct.Struct("iIII")
+
+
+class FileWatcher:
+    """
+    监视若干文件的变化，变化稳定debounce秒后在后台线程中回调callback(path)
+    Linux 下使用 inotify 监视所在目录，其他平台或inotify不可用时按interval轮询(mtime, size)
+    """
+
+    def __init__(self, paths: List[str], callback: Callable[[str], None],
+                 interval: float = 0.5, debounce: float = 0.1):
+        self.paths = [os.path.abspath(path) for path in paths]
+        self.callback = callback
+        self.interval = interval
+        self.debounce = debounce
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.mode = ""
+
+    def start(self) -> None:
+        if self._thread:
+            return
+        self._stop.clear()
+        fd = self._inotify_init()
+        if fd is not None:
+            self.mode = "inotify"
+            target = lambda: self._inotify_loop(fd)
+        else:
+            self.mode = "poll"
+            target = self._poll_loop
+        self._thread = threading.Thread(target=target, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread = None
+
+    def _fire(self, paths: Set[str]) -> None:
+        for path in sorted(paths):
+            try:
+                self.callback(path)
+            except Exception:
+                pass
+
+    # ---------- 轮询 ----------
+    @staticmethod
+    def _stat(path: str) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def _poll_loop(self) -> None:
+        last: Dict[str, Optional[Tuple[int, int]]] = {path: self._stat(path) for path in self.paths}
+        while not self._stop.wait(self.interval):
+            changed = set()
+            for path in self.paths:
+                current = self._stat(path)
+                if current != last[path]:
+                    last[path] = current
+                    if current is not None:
+                        changed.add(path)
+            if changed:
+                # 等待写入稳定
+                if self._stop.wait(self.debounce):
+                    return
+                for path in changed:
+                    last[path] = self._stat(path)
+                self._fire(changed)
+
+    # ---------- inotify ----------
+    def _inotify_init(self) -> Optional[int]:
+        if not sys.platform.startswith("linux"):
+            return None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            fd = libc.inotify_init1(IN_CLOEXEC)
+            if fd < 0:
+                return None
+            mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_MODIFY
+            self._watches: Dict[int, str] = {}
+            for directory in {os.path.dirname(path) for path in self.paths}:
+                wd = libc.inotify_add_watch(fd, directory.encode(), mask)
+                if wd < 0:
+                    os.close(fd)
+                    return None
+                self._watches[wd] = directory
+            return fd
+        except Exception:
+            return None
+
+    def _read_events(self, fd: int) -> Set[str]:
+        data = os.read(fd, 4096)
+        changed = set()
+        offset = 0
+        while offset + INOTIFY_EVENT.size <= len(data):
+            wd, mask, cookie, length = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+            name = data[offset:offset + length].rstrip(b"\0").decode(errors="replace")
+            offset += length
+            path = os.path.join(self._watches.get(wd, ""), name)
+            if path in self.paths:
+                changed.add(path)
+        return changed
+
+    def _inotify_loop(self, fd: int) -> None:
+        try:
+            pending: Set[str] = set()
+            while not self._stop.is_set():
+                # 有待处理的变化时以debounce为超时，合并连续写入
+                timeout = self.debounce if pending else self.interval
+                readable, _, _ = select.select([fd], [], [], timeout)
+                if readable:
+                    pending |= self._read_events(fd)
+                elif pending:
+                    self._fire(pending)
+                    pending = set()
+        finally:
+            os.close(fd)